@@ -1,6 +1,6 @@
-import os
-import trafilatura
 from urllib.parse import urlparse
+import artifact_store
+from http_cache import fetch
 
 def sanitize_filename(title):
     """Remove invalid characters from filename"""
@@ -9,24 +9,34 @@ def sanitize_filename(title):
         title = title.replace(char, '')
     return title[:100].strip()
 
-def extract_article(url):
-    """Extrait le contenu textuel d'un article web"""
-    downloaded = trafilatura.fetch_url(url)
-    if not downloaded:
-        raise Exception(f"Impossible de télécharger: {url}")
+def parse_article(html, url):
+    """Extrait texte et métadonnées en une seule passe de parsing"""
+    import trafilatura
 
-    # Extraire le texte avec métadonnées
-    result = trafilatura.extract(
-        downloaded,
+    document = trafilatura.bare_extraction(
+        html,
+        url=url,
         include_comments=False,
         include_tables=True,
-        output_format='txt'
+        with_metadata=True,
     )
+    if document is None:
+        return None, None
+
+    # Le Document sert aussi de métadonnées (title, author, date)
+    return document.text, document
+
+def extract_article(url, html=None):
+    """Extrait le contenu textuel d'un article web (html déjà téléchargé optionnel)"""
+    try:
+        downloaded = html if html is not None else fetch(url)
+    except Exception as e:
+        raise Exception(f"Impossible de télécharger: {url} ({e})")
 
-    # Récupérer les métadonnées séparément
-    metadata = trafilatura.extract_metadata(downloaded)
+    if not downloaded:
+        raise Exception(f"Impossible de télécharger: {url}")
 
-    return result, metadata
+    return parse_article(downloaded, url)
 
 def article_to_markdown(content, url, metadata=None):
     """Convertit l'article en markdown"""
@@ -54,12 +64,10 @@ def article_to_markdown(content, url, metadata=None):
 
     return '\n'.join(lines)
 
-def save_article(url, output_dir="output"):
-    """Extract and save article as .md with article title"""
-    os.makedirs(output_dir, exist_ok=True)
-
-    print("Fetching article...")
-    content, metadata = extract_article(url)
+def save_article(url, output_dir=None, html=None):
+    """Extract and save article as .md with article title (in the artifact store)"""
+    print("Fetching article..." if html is None else f"Parsing prefetched article: {url}")
+    content, metadata = extract_article(url, html)
 
     # Get title from metadata
     title = metadata.title if metadata and metadata.title else "Untitled Article"
@@ -70,10 +78,7 @@ def save_article(url, output_dir="output"):
     # Filename based on article title
     safe_title = sanitize_filename(title)
     filename = f"{safe_title}_article.md"
-    filepath = os.path.join(output_dir, filename)
-
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(markdown)
+    filepath = artifact_store.put_text(markdown, filename, kind="transcript", root=output_dir)
 
     print(f"Article saved: {filepath}")
     return filepath, title
@@ -86,7 +91,6 @@ if __name__ == "__main__":
     try:
         filepath, title = save_article(test_url)
         print(f"\nContent (first 500 chars):")
-        with open(filepath, 'r') as f:
-            print(f.read()[:500])
+        print(artifact_store.read_text(filepath)[:500])
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Concurrent article prefetching for backlog runs.
+
+Downloads many article URLs at once with aiohttp (bounded per domain),
+shares the on-disk conditional-GET cache with http_cache, and yields each
+saved markdown file as soon as its download finishes.
+"""
+
+import os
+import queue
+import asyncio
+import threading
+from http_cache import (
+    MAX_BODY_BYTES, USER_AGENT, load_cached, conditional_headers, store_response,
+)
+from article_extractor import save_article
+
+# Concurrency limits (total and per remote host)
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "16"))
+PREFETCH_PER_DOMAIN = int(os.getenv("PREFETCH_PER_DOMAIN", "2"))
+PREFETCH_TIMEOUT = 30
+
+_DONE = object()
+
+async def _fetch_one(session, url, max_bytes):
+    """Download one URL, revalidating against the disk cache"""
+    meta, cached_body = load_cached(url)
+
+    async with session.get(url, headers=conditional_headers(meta)) as response:
+        if response.status == 304 and cached_body is not None:
+            return cached_body
+
+        response.raise_for_status()
+
+        if response.content_length and response.content_length > max_bytes:
+            raise Exception(f"Response too large ({response.content_length} bytes): {url}")
+
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > max_bytes:
+                raise Exception(f"Response exceeds {max_bytes} bytes: {url}")
+            chunks.append(chunk)
+        body = b''.join(chunks)
+
+        store_response(url, response.headers, body)
+        return body
+
+async def _prefetch(urls, results, output_dir, concurrency, per_domain, timeout):
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_domain)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    loop = asyncio.get_running_loop()
+
+    async def worker(url):
+        try:
+            html = await _fetch_one(session, url, MAX_BODY_BYTES)
+            # Parsing is CPU-bound: keep it off the event loop
+            result = await loop.run_in_executor(None, save_article, url, output_dir, html)
+        except Exception as e:
+            result = e
+        results.put((url, result))
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout,
+                                     headers={'User-Agent': USER_AGENT}) as session:
+        await asyncio.gather(*(worker(url) for url in urls))
+
+def prefetch_articles(urls, output_dir=None, concurrency=PREFETCH_CONCURRENCY,
+                      per_domain=PREFETCH_PER_DOMAIN, timeout=PREFETCH_TIMEOUT):
+    """
+    Download and extract articles concurrently.
+
+    Yields (url, result) in completion order, where result is the
+    (filepath, title) returned by save_article() or the exception raised.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return
+
+    results = queue.Queue()
+
+    def run():
+        try:
+            asyncio.run(_prefetch(urls, results, output_dir, concurrency, per_domain, timeout))
+        except Exception as e:
+            print(f"Prefetch error: {e}")
+        finally:
+            results.put(_DONE)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    print(f"Prefetching {len(urls)} article(s) "
+          f"({concurrency} concurrent, {per_domain} per domain)...")
+
+    while True:
+        item = results.get()
+        if item is _DONE:
+            break
+        yield item
+
+    thread.join()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for transcripts, summaries and audio.
+
+Artifacts live under <ARTIFACT_DIR>/objects/<sha[:2]>/<sha>/<name>, where
+sha is the SHA-256 of the content and name the human-readable file name
+(the title-based name used for Drive and Notion). Two items with the same
+title no longer overwrite each other, and identical content is stored once
+(further names are hard links in the same directory).
+Text artifacts are gzip-compressed on disk (<name>.gz); read_text() and
+plain_file() hide that from the stages.
+
+Every write goes to a temporary file first and is renamed into place, so a
+concurrent reader never sees a partial file. A metadata index
+(<ARTIFACT_DIR>/artifacts.db) records each object's kind, sizes, last access
+and delivery, and maps page IDs, URLs and content keys to artifacts. Once
+artifacts are delivered (Notion updated), the least recently used ones are
+evicted whenever the store grows beyond ARTIFACT_QUOTA_MB. Undelivered
+artifacts are never evicted.
+
+Paths outside the store (files written before it existed) are still read as
+plain files.
+"""
+
+import os
+import gzip
+import time
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+from contextlib import closing, contextmanager
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "output")
+
+# Disk quota for the store in MB (0 = unlimited), enforced on delivered artifacts
+ARTIFACT_QUOTA_MB = float(os.getenv("ARTIFACT_QUOTA_MB", "2048"))
+
+# Stored gzip-compressed
+TEXT_EXTENSIONS = ('.md', '.txt')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    kind TEXT,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    compressed INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS objects_lru ON objects (delivered_at, accessed_at);
+CREATE TABLE IF NOT EXISTS refs (
+    sha256 TEXT NOT NULL,
+    page_id TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT '',
+    content_key TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    PRIMARY KEY (sha256, page_id, url)
+);
+CREATE INDEX IF NOT EXISTS refs_page ON refs (page_id);
+CREATE INDEX IF NOT EXISTS refs_url ON refs (url);
+CREATE INDEX IF NOT EXISTS refs_key ON refs (content_key);
+"""
+
+_initialized = set()
+
+def _root(root=None):
+    return os.path.abspath(root or ARTIFACT_DIR)
+
+def _connect(root=None):
+    root = _root(root)
+    path = os.path.join(root, "artifacts.db")
+    if path not in _initialized:
+        os.makedirs(root, exist_ok=True)
+        with closing(sqlite3.connect(path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        _initialized.add(path)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _objects_dir(root=None):
+    return os.path.join(_root(root), "objects")
+
+def _tmp_dir(root=None):
+    tmp_dir = os.path.join(_objects_dir(root), "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return tmp_dir
+
+def temp_path(suffix="", root=None):
+    """A fresh temporary path inside the store (same filesystem, so renames are atomic)"""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=_tmp_dir(root))
+    os.close(fd)
+    return path
+
+def _sha_of(path):
+    """SHA-256 an artifact path is stored under, or None for a path outside the store"""
+    parent = os.path.dirname(os.path.abspath(path))
+    sha = os.path.basename(parent)
+    if len(sha) == 64 and os.path.basename(os.path.dirname(os.path.dirname(parent))) == "objects":
+        return sha
+    return None
+
+def display_name(path):
+    """Human-readable file name of an artifact (without the .gz of compressed text)"""
+    name = os.path.basename(path)
+    if _sha_of(path) and name.endswith('.gz'):
+        name = name[:-3]
+    return name
+
+def _store(tmp_path, sha, name, kind, size, compressed, root=None):
+    """Rename a finished temporary file into place and index it; returns its path"""
+    directory = os.path.join(_objects_dir(root), sha[:2], sha)
+    path = os.path.join(directory, name + ('.gz' if compressed else ''))
+    now = time.time()
+
+    with closing(_connect(root)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT path FROM objects WHERE sha256 = ?", (sha,)).fetchone()
+            if row and os.path.exists(row['path']):
+                # Same content already stored: at most a hard link under this name
+                os.remove(tmp_path)
+                path = os.path.join(directory, name + ('.gz' if row['path'].endswith('.gz') else ''))
+                if not os.path.exists(path):
+                    try:
+                        os.link(row['path'], path)
+                    except FileExistsError:
+                        pass
+                conn.execute("UPDATE objects SET accessed_at = ? WHERE sha256 = ?", (now, sha))
+                conn.execute("COMMIT")
+                return path
+
+            os.makedirs(directory, exist_ok=True)
+            os.replace(tmp_path, path)
+            conn.execute(
+                "INSERT OR REPLACE INTO objects (sha256, path, kind, name, size, stored_size, "
+                "compressed, created_at, accessed_at, delivered_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+                (sha, path, kind, name, size, os.path.getsize(path), int(compressed), now, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return path
+
+def put_text(text, name, kind=None, root=None):
+    """Store a text artifact (compressed if .md/.txt); returns its path"""
+    data = text.encode('utf-8')
+    sha = hashlib.sha256(data).hexdigest()
+    compressed = name.lower().endswith(TEXT_EXTENSIONS)
+
+    tmp_path = temp_path(root=root)
+    with open(tmp_path, 'wb') as f:
+        # mtime=0: the same text always gives the same bytes
+        f.write(gzip.compress(data, mtime=0) if compressed else data)
+    return _store(tmp_path, sha, name, kind, len(data), compressed, root)
+
+def put_file(src_path, name, kind=None, root=None):
+    """Move a finished file (e.g. from temp_path()) into the store; returns its path"""
+    digest = hashlib.sha256()
+    with open(src_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    size = os.path.getsize(src_path)
+
+    if os.path.dirname(os.path.abspath(src_path)) != _tmp_dir(root):
+        # Outside the store: copy first so the final rename stays atomic
+        tmp_path = temp_path(root=root)
+        shutil.copyfile(src_path, tmp_path)
+        src_path = tmp_path
+    return _store(src_path, digest.hexdigest(), name, kind, size, False, root)
+
+def _touch(path, root=None):
+    sha = _sha_of(path)
+    if sha:
+        with closing(_connect(root)) as conn:
+            conn.execute("UPDATE objects SET accessed_at = ? WHERE sha256 = ?",
+                         (time.time(), sha))
+
+def read_text(path, root=None):
+    """Text of an artifact, decompressed if needed"""
+    if _sha_of(path) and path.endswith('.gz'):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    _touch(path, root)
+    return text
+
+@contextmanager
+def plain_file(path, root=None):
+    """
+    Yield a path to the artifact's uncompressed bytes under its display name
+    (a temporary copy for compressed text, removed afterwards).
+    """
+    _touch(path, root)
+    if not (_sha_of(path) and path.endswith('.gz')):
+        yield path
+        return
+
+    tmp_dir = tempfile.mkdtemp(dir=_tmp_dir(root))
+    plain_path = os.path.join(tmp_dir, display_name(path))
+    try:
+        with gzip.open(path, 'rb') as src, open(plain_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        yield plain_path
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def link(path, page_id=None, url=None, content_key=None, root=None):
+    """Record that an artifact belongs to a Notion page / URL / content key"""
+    sha = _sha_of(path)
+    if not sha:
+        return
+    with closing(_connect(root)) as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO refs (sha256, page_id, url, content_key, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (sha, page_id or '', url or '', content_key or '', time.time()),
+        )
+
+def artifacts_for(page_id=None, url=None, content_key=None, root=None):
+    """Stored artifacts of a page, URL or content key: [{kind, name, path, size, ...}]"""
+    conditions, params = [], []
+    for column, value in (("page_id", page_id), ("url", url), ("content_key", content_key)):
+        if value:
+            conditions.append(f"refs.{column} = ?")
+            params.append(value)
+    if not conditions:
+        return []
+
+    with closing(_connect(root)) as conn:
+        rows = conn.execute(
+            "SELECT DISTINCT objects.* FROM objects JOIN refs USING (sha256) "
+            f"WHERE {' AND '.join(conditions)} ORDER BY objects.created_at",
+            params,
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def mark_delivered(paths, root=None):
+    """Mark artifacts as delivered: they become candidates for eviction"""
+    shas = [sha for sha in map(_sha_of, paths) if sha]
+    if not shas:
+        return
+    with closing(_connect(root)) as conn:
+        conn.executemany("UPDATE objects SET delivered_at = ? WHERE sha256 = ?",
+                         [(time.time(), sha) for sha in shas])
+
+def usage(root=None):
+    """(stored bytes, uncompressed bytes, object count)"""
+    with closing(_connect(root)) as conn:
+        row = conn.execute("SELECT COALESCE(SUM(stored_size), 0), COALESCE(SUM(size), 0), "
+                           "COUNT(*) FROM objects").fetchone()
+    return tuple(row)
+
+def enforce_quota(quota_mb=None, root=None):
+    """
+    Evict least recently used delivered artifacts until under quota.
+
+    Returns the content keys the evicted artifacts belonged to.
+    """
+    quota_mb = ARTIFACT_QUOTA_MB if quota_mb is None else quota_mb
+    if quota_mb <= 0:
+        return set()
+    quota = quota_mb * 1024 * 1024
+
+    freed = 0
+    evicted_keys = set()
+    with closing(_connect(root)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            total = conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM objects").fetchone()[0]
+            if total > quota:
+                candidates = conn.execute(
+                    "SELECT sha256, path, stored_size FROM objects "
+                    "WHERE delivered_at IS NOT NULL ORDER BY accessed_at"
+                ).fetchall()
+                for row in candidates:
+                    if total - freed <= quota:
+                        break
+                    shutil.rmtree(os.path.dirname(row['path']), ignore_errors=True)
+                    evicted_keys.update(ref['content_key'] for ref in conn.execute(
+                        "SELECT DISTINCT content_key FROM refs "
+                        "WHERE sha256 = ? AND content_key != ''", (row['sha256'],)))
+                    conn.execute("DELETE FROM objects WHERE sha256 = ?", (row['sha256'],))
+                    conn.execute("DELETE FROM refs WHERE sha256 = ?", (row['sha256'],))
+                    freed += row['stored_size']
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    if freed:
+        print(f"Artifact store: evicted {freed / (1024 * 1024):.1f} MB of delivered artifacts "
+              f"(quota {quota_mb:g} MB)")
+    if total - freed > quota:
+        print(f"Artifact store: {(total - freed) / (1024 * 1024):.1f} MB in use, over the "
+              f"{quota_mb:g} MB quota with nothing delivered left to evict")
+    return evicted_keys
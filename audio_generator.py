@@ -4,8 +4,10 @@ Text-to-Speech audio generation using Edge TTS (free).
 """
 
 import asyncio
-import edge_tts
 import os
+from tracing import span
+import circuit_breaker
+import artifact_store
 
 # Good quality English voices
 VOICES = {
@@ -21,6 +23,8 @@ DEFAULT_VOICE = "en-US-AriaNeural"
 
 async def _generate_audio(text: str, output_path: str, voice: str = DEFAULT_VOICE):
     """Generate audio from text using Edge TTS"""
+    import edge_tts
+
     communicate = edge_tts.Communicate(text, voice)
     await communicate.save(output_path)
 
@@ -50,11 +54,10 @@ def generate_audio_from_summary(summary_path: str, voice: str = DEFAULT_VOICE) -
         voice: Voice ID to use
 
     Returns:
-        Path to the generated audio file
+        Path to the generated audio file (in the artifact store)
     """
     # Read the summary
-    with open(summary_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = artifact_store.read_text(summary_path)
 
     # Remove markdown metadata header (everything before first ---)
     if '---' in content:
@@ -71,11 +74,20 @@ def generate_audio_from_summary(summary_path: str, voice: str = DEFAULT_VOICE) -
         lines.append(line)
     content = '\n'.join(lines)
 
-    # Generate output path
-    audio_path = summary_path.replace('_summary.md', '_audio.mp3')
+    # Generate into a temporary file, then move it into the store in one rename
+    audio_name = artifact_store.display_name(summary_path).replace('_summary.md', '_audio.mp3')
+    tmp_path = artifact_store.temp_path('.mp3')
 
     print(f"Generating audio ({len(content)} chars)...")
-    generate_audio(content, audio_path, voice)
+    try:
+        with span("tts", input_chars=len(content), voice=voice) as attrs, \
+                circuit_breaker.guard("tts"):
+            generate_audio(content, tmp_path, voice)
+            attrs['audio_bytes'] = os.path.getsize(tmp_path)
+        audio_path = artifact_store.put_file(tmp_path, audio_name, kind="audio")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
     # Get file size
     size_mb = os.path.getsize(audio_path) / (1024 * 1024)
@@ -86,6 +98,8 @@ def generate_audio_from_summary(summary_path: str, voice: str = DEFAULT_VOICE) -
 
 def list_voices():
     """List available voices"""
+    import edge_tts
+
     async def _list():
         voices = await edge_tts.list_voices()
         return [v for v in voices if v['Locale'].startswith('en-')]
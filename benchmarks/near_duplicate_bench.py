@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the near-duplicate index (near_duplicates.py).
+
+Fills a temporary index with N synthetic documents, then looks up edited
+copies of indexed documents (a few percent of the words replaced) and
+unrelated new documents. Reports the index size on disk, the signature and
+lookup times, and how many edited copies were found (recall) and how many
+unrelated documents matched something (false positives).
+
+Usage:
+    python benchmarks/near_duplicate_bench.py [--documents 10000 50000]
+        [--queries 500] [--edit-rate 0.02] [--output near_duplicates.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import near_duplicates  # noqa: E402
+from near_duplicates import NearDuplicateIndex, signature  # noqa: E402
+
+# A vocabulary large enough that unrelated documents share few 5-shingles
+VOCABULARY = [f"w{i}" for i in range(5000)]
+
+def document(rng, words):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+def edited(text, rng, rate):
+    """Copy of text with a share of its words replaced"""
+    words = text.split()
+    for i in rng.sample(range(len(words)), int(len(words) * rate)):
+        words[i] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+def run_size(count, args, rng):
+    workdir = tempfile.mkdtemp(prefix="near-duplicates-")
+    index = NearDuplicateIndex(os.path.join(workdir, "index.db"))
+    try:
+        # Signatures of indexed documents; only the queried ones keep their text
+        queried = set(rng.sample(range(count), args.queries))
+        texts = {}
+        signing = []
+        started = time.perf_counter()
+        for i in range(count):
+            text = document(rng, args.words)
+            sign_started = time.perf_counter()
+            sig = signature(text)
+            signing.append(time.perf_counter() - sign_started)
+            index.add(f"doc:{i}", sig)
+            if i in queried:
+                texts[i] = text
+        build_seconds = time.perf_counter() - started
+
+        lookups, found, false_positives = [], 0, 0
+        for i, text in texts.items():
+            sig = signature(edited(text, rng, args.edit_rate))
+            started = time.perf_counter()
+            matches = index.query(sig)
+            lookups.append(time.perf_counter() - started)
+            found += any(key == f"doc:{i}" for key, _ in matches)
+
+        for _ in range(args.queries):
+            sig = signature(document(rng, args.words))
+            started = time.perf_counter()
+            matches = index.query(sig)
+            lookups.append(time.perf_counter() - started)
+            false_positives += bool(matches)
+
+        return {
+            "documents": count,
+            "index_mb": round(os.path.getsize(index.path) / (1024 * 1024), 2),
+            "bytes_per_document": round(os.path.getsize(index.path) / count),
+            "build_seconds": round(build_seconds, 2),
+            "signature_ms_p50": round(percentile(signing, 50) * 1000, 3),
+            "lookup_ms_p50": round(percentile(lookups, 50) * 1000, 3),
+            "lookup_ms_p99": round(percentile(lookups, 99) * 1000, 3),
+            "recall": round(found / len(texts), 3),
+            "false_positive_rate": round(false_positives / args.queries, 3),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate index benchmark")
+    parser.add_argument("--documents", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--words", type=int, default=300, help="words per document")
+    parser.add_argument("--queries", type=int, default=500,
+                        help="edited copies and unrelated documents looked up")
+    parser.add_argument("--edit-rate", type=float, default=0.02,
+                        help="share of words replaced in the edited copies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="save the results as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = [run_size(count, args, rng) for count in args.documents]
+
+    print(f"Threshold {near_duplicates.THRESHOLD}, {near_duplicates.BANDS} bands x "
+          f"{near_duplicates.ROWS} rows, {args.edit_rate:.0%} of words edited\n")
+    print(f"{'Documents':>10}{'Index (MB)':>12}{'B/doc':>7}{'Sign (ms)':>11}"
+          f"{'Lookup p50':>12}{'p99 (ms)':>10}{'Recall':>8}{'False +':>9}")
+    for r in results:
+        print(f"{r['documents']:>10,}{r['index_mb']:>12}{r['bytes_per_document']:>7}"
+              f"{r['signature_ms_p50']:>11}{r['lookup_ms_p50']:>12}{r['lookup_ms_p99']:>10}"
+              f"{r['recall']:>8.1%}{r['false_positive_rate']:>9.1%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of process_all.
+
+Every external service is replaced by a local stand-in with configurable
+latency: a fake Notion API and Drive upload endpoint and the article pages
+(one local HTTP server), a fake `claude` executable, a fake TTS writer and
+canned YouTube transcripts. N synthetic entries (half videos, half articles)
+go through the real pipeline code; the stage timings come from its spans.
+
+Reports entries/minute, per-stage p50/p95 and peak RSS, and saves them as
+JSON so runs can be compared across commits.
+
+Usage:
+    python benchmarks/pipeline_bench.py [--entries 20] [--llm-latency 2.0]
+        [--llm-jitter 0.3 --llm-tail-rate 0.1 --llm-tail-latency 60]
+        [--output results.json] [--compare previous.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import contextlib
+import subprocess
+from types import SimpleNamespace
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+WORDS = ("pipeline summary transcript audio latency model context stage worker "
+         "queue notion drive article video chunk token speech upload batch cache").split()
+
+# Written to <workdir>/bin/claude: sleeps (with jitter, and now and then a
+# tail-latency stall), then prints a summary of the requested length
+FAKE_CLAUDE = '''#!{python}
+import os, re, sys, time, random
+latency = float(os.getenv("FAKE_CLAUDE_LATENCY", "0"))
+latency *= 1 + random.uniform(-1, 1) * float(os.getenv("FAKE_CLAUDE_JITTER", "0"))
+if random.random() < float(os.getenv("FAKE_CLAUDE_TAIL_RATE", "0")):
+    latency = float(os.getenv("FAKE_CLAUDE_TAIL_LATENCY", "0"))
+time.sleep(latency)
+prompt = sys.argv[sys.argv.index("-p") + 1] if "-p" in sys.argv else ""
+match = re.search(r"approximately (\\d+)", prompt)
+words = {words!r}
+count = int(match.group(1)) if match else 300
+print("## Summary\\n\\n" + " ".join(random.choice(words) for _ in range(count)))
+'''
+
+# Filler text vocabulary: large enough that unrelated entries don't look like
+# near-duplicates of each other (see near_duplicates.py)
+VOCABULARY = [f"{word}{i}" for word in WORDS for i in range(200)]
+
+def lorem(count, rng):
+    """count words of filler text, in sentences"""
+    words = [rng.choice(VOCABULARY) for _ in range(count)]
+    return ". ".join(" ".join(words[i:i + 12]) for i in range(0, count, 12)) + "."
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+def peak_rss_mb(who):
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+class StandIns:
+    """Local HTTP server for the fake Notion API, Drive endpoint and article pages"""
+
+    def __init__(self, args):
+        self.args = args
+        self.entries = []
+        self.uploads = 0
+        self.uploaded_bytes = 0
+        self.notion_updates = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def article_html(self, index):
+        # Distinct per article, or near-duplicate detection would reuse one summary
+        rng = random.Random(f"{self.args.seed}-article-{index}")
+        paragraphs = "".join(f"<p>{lorem(80, rng)}</p>"
+                             for _ in range(max(1, self.args.article_words // 80)))
+        title = f"Benchmark article {index}"
+        return (f"<html><head><title>{title}</title></head><body><article>"
+                f"<h1>{title}</h1>{paragraphs}</article></body></html>")
+
+    def build_entries(self):
+        """Notion pages: even indexes are videos, odd ones are articles"""
+        for i in range(self.args.entries):
+            if i % 2 == 0:
+                url = f"https://www.youtube.com/watch?v={i:011d}"
+            else:
+                url = f"{self.url}/articles/{i}"
+            self.entries.append({
+                "id": f"bench-page-{i}",
+                "created_time": "2026-01-01T00:00:00.000Z",
+                "properties": {
+                    "Link": {"title": [{"plain_text": url}]},
+                    "Text summary": {"files": []},
+                },
+            })
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+    def _handler(self):
+        stand_ins = self
+        args = self.args
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status, body=b"", content_type="application/json"):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode()
+                elif isinstance(body, str):
+                    body = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _read_body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_GET(self):
+                if self.path.startswith("/articles/"):
+                    time.sleep(args.article_latency)
+                    index = self.path.rsplit("/", 1)[1]
+                    html = stand_ins.article_html(index)
+                    return self._send(200, html, "text/html; charset=utf-8")
+                self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                body = self._read_body()
+                if self.path.startswith("/v1/databases/"):
+                    time.sleep(args.notion_latency)
+                    return self._send(200, {"results": stand_ins.entries, "has_more": False})
+                if self.path.startswith("/drive/upload"):
+                    time.sleep(args.drive_latency)
+                    with stand_ins.lock:
+                        stand_ins.uploads += 1
+                        stand_ins.uploaded_bytes += len(body)
+                        file_id = f"file-{stand_ins.uploads}"
+                    return self._send(200, {"id": file_id,
+                                            "webViewLink": f"{stand_ins.url}/drive/view/{file_id}"})
+                if self.path.startswith("/drive/permissions"):
+                    time.sleep(args.drive_latency)
+                    return self._send(200, {"id": "anyone"})
+                self._send(404, {"error": "not found"})
+
+            def do_PATCH(self):
+                self._read_body()
+                if self.path.startswith("/v1/pages/"):
+                    time.sleep(args.notion_latency)
+                    with stand_ins.lock:
+                        stand_ins.notion_updates += 1
+                    return self._send(200, {"object": "page"})
+                self._send(404, {"error": "not found"})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+class FakeDriveService:
+    """Just enough of the Drive v3 client for drive_uploader.upload_to_drive"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def files(self):
+        return self
+
+    def permissions(self):
+        return SimpleNamespace(create=self._permission)
+
+    def create(self, body=None, media_body=None, fields=None):
+        import requests
+        data = media_body.getbytes(0, media_body.size()) if media_body is not None else b""
+        return SimpleNamespace(execute=lambda: requests.post(
+            f"{self.base_url}/drive/upload", data=data, timeout=30).json())
+
+    def _permission(self, fileId=None, body=None):
+        import requests
+        return SimpleNamespace(execute=lambda: requests.post(
+            f"{self.base_url}/drive/permissions", json=body, timeout=30).json())
+
+def install_stand_ins(stand_ins, args, workdir):
+    """Point the pipeline modules at the stand-ins (before process_all runs)"""
+    import drive_uploader
+    import audio_generator
+    import youtube_transcript
+    import job_manifest
+    import http_cache
+    import near_duplicates
+    import circuit_breaker
+    import artifact_store
+
+    job_manifest.MANIFEST_DIR = os.path.join(workdir, ".jobs")
+    near_duplicates.DB_PATH = os.path.join(workdir, ".jobs", "near_duplicates.db")
+    circuit_breaker.DB_PATH = os.path.join(workdir, ".jobs", "breakers.db")
+    artifact_store.ARTIFACT_DIR = os.path.join(workdir, "output")
+    http_cache.CACHE_DIR = os.path.join(workdir, ".cache", "http")
+
+    drive = FakeDriveService(stand_ins.url)
+    drive_uploader.get_drive_service = lambda: drive
+
+    def transcript_for(video_url):
+        # Distinct per video, or near-duplicate detection would reuse one summary
+        rng = random.Random(f"{args.seed}-{video_url}")
+        return [SimpleNamespace(text=lorem(60, rng))
+                for _ in range(max(1, args.transcript_words // 60))]
+
+    def get_video_info(video_url):
+        time.sleep(args.youtube_latency)
+        video_id = youtube_transcript.extract_video_id(video_url)
+        return {"title": f"Benchmark video {video_id}", "channel": "Benchmark",
+                "duration": args.transcript_words * 60 // 150}
+
+    def get_transcript(video_url, languages=("fr", "en")):
+        time.sleep(args.youtube_latency)
+        return transcript_for(video_url), "en"
+
+    youtube_transcript.get_video_info = get_video_info
+    youtube_transcript.get_transcript = get_transcript
+
+    def generate_audio(text, output_path, voice=audio_generator.DEFAULT_VOICE):
+        # ~15 chars per second of speech, 128 kbit/s MP3
+        time.sleep(args.tts_latency)
+        with open(output_path, "wb") as f:
+            f.write(b"\0" * (len(text) // 15 * 16000))
+        return output_path
+
+    audio_generator.generate_audio = generate_audio
+
+def write_fake_claude(workdir):
+    path = os.path.join(workdir, "bin", "claude")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(FAKE_CLAUDE.format(python=sys.executable, words=WORDS))
+    os.chmod(path, 0o755)
+    return path
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="pipeline-bench-")
+    stand_ins = StandIns(args)
+    stand_ins.build_entries()
+    stand_ins.start()
+
+    # Read at import time by the pipeline modules
+    os.environ.update({
+        "NOTION_API_URL": f"{stand_ins.url}/v1",
+        "NOTION_TOKEN": "bench",
+        "NOTION_DATABASE_ID": "bench",
+        "GDRIVE_FOLDER_ID": "bench",
+        "CLAUDE_BIN": write_fake_claude(workdir),
+        "FAKE_CLAUDE_LATENCY": str(args.llm_latency),
+        "FAKE_CLAUDE_JITTER": str(args.llm_jitter),
+        "FAKE_CLAUDE_TAIL_RATE": str(args.llm_tail_rate),
+        "FAKE_CLAUDE_TAIL_LATENCY": str(args.llm_tail_latency),
+        "SPAN_LOG": os.path.join(workdir, "spans.jsonl"),
+    })
+    sys.path.insert(0, REPO_DIR)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        import tracing
+        import process_all
+
+        install_stand_ins(stand_ins, args, workdir)
+        tracing.start_collecting()
+
+        started = time.perf_counter()
+        output = sys.stdout if args.verbose else open(os.devnull, "w")
+        with contextlib.redirect_stdout(output):
+            completed, failed = process_all.main(profile=args.profile)
+        wall = time.perf_counter() - started
+        spans = tracing.drain()
+    finally:
+        os.chdir(cwd)
+        stand_ins.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    stages = {}
+    for span in spans:
+        stages.setdefault(span["name"], []).append(span)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "entries": args.entries,
+        "succeeded": len(completed),
+        "failed": len(failed),
+        "wall_seconds": round(wall, 3),
+        "entries_per_minute": round(len(completed) / wall * 60, 2) if wall else None,
+        "stages": {
+            name: {
+                "count": len(items),
+                "errors": sum(1 for s in items if s["status"] != "ok"),
+                "p50": percentile([s["duration"] for s in items], 50),
+                "p95": percentile([s["duration"] for s in items], 95),
+                "max": max(s["duration"] for s in items),
+                "total": round(sum(s["duration"] for s in items), 3),
+                "hedged": sum(1 for s in items if s["attrs"].get("hedged")),
+            }
+            for name, items in sorted(stages.items())
+        },
+        "uploads": stand_ins.uploads,
+        "uploaded_bytes": stand_ins.uploaded_bytes,
+        "notion_updates": stand_ins.notion_updates,
+        "peak_rss_mb": {
+            "self": peak_rss_mb(resource.RUSAGE_SELF),
+            "children": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        },
+        "workdir": workdir if args.keep else None,
+    }
+
+def print_report(result, previous=None):
+    def delta(new, old):
+        if old in (None, 0) or new is None:
+            return ""
+        return f" ({(new - old) / old * 100:+.0f}%)"
+
+    prev_stages = (previous or {}).get("stages", {})
+    print(f"\nCommit {result['commit']}: {result['succeeded']}/{result['entries']} entries "
+          f"in {result['wall_seconds']}s")
+    print(f"Throughput: {result['entries_per_minute']} entries/min"
+          + delta(result['entries_per_minute'], (previous or {}).get('entries_per_minute')))
+    print(f"Peak RSS: {result['peak_rss_mb']['self']} MB "
+          f"(children {result['peak_rss_mb']['children']} MB)\n")
+
+    print(f"{'Stage':<18}{'Count':>6}{'Errors':>8}{'Hedged':>8}{'p50 (s)':>10}{'p95 (s)':>10}"
+          f"{'max (s)':>10}")
+    for name, stats in result["stages"].items():
+        old = prev_stages.get(name, {})
+        print(f"{name:<18}{stats['count']:>6}{stats['errors']:>8}{stats.get('hedged', 0):>8}"
+              f"{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats.get('max', 0):>10.3f}"
+              + delta(stats['p95'], old.get('p95')))
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--entries", type=int, default=20, help="synthetic Notion entries")
+    parser.add_argument("--transcript-words", type=int, default=6000)
+    parser.add_argument("--article-words", type=int, default=1500)
+    parser.add_argument("--notion-latency", type=float, default=0.2, help="seconds per Notion call")
+    parser.add_argument("--drive-latency", type=float, default=0.3, help="seconds per Drive call")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="seconds per claude call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0,
+                        help="claude latency varies by up to this fraction either way")
+    parser.add_argument("--llm-tail-rate", type=float, default=0.0,
+                        help="share of claude calls that stall for --llm-tail-latency")
+    parser.add_argument("--llm-tail-latency", type=float, default=60.0,
+                        help="seconds of a stalled claude call")
+    parser.add_argument("--tts-latency", type=float, default=1.0, help="seconds per TTS call")
+    parser.add_argument("--youtube-latency", type=float, default=0.3,
+                        help="seconds per metadata/transcript fetch")
+    parser.add_argument("--article-latency", type=float, default=0.2, help="seconds per page fetch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result JSON (default benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument("--compare", help="previous result JSON to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the working directory")
+    parser.add_argument("--profile", action="store_true",
+                        help="also write per-stage profiles (see profiling.py; needs --keep)")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline output")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(result, previous)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{result['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults saved to {output}")
+    sys.exit(0 if result["failed"] == 0 else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the extractive pre-compression (extractive.py) on long
+synthetic transcripts.
+
+Each transcript mixes informative sentences on a handful of topics with
+spoken filler and near-verbatim repetitions, at ~150 words per minute. For
+every length the harness reports the compression ratio, the time taken,
+the chunks (claude -p calls) before and after, and how much of the filler
+and repetition was dropped compared with the informative sentences.
+
+Usage:
+    python benchmarks/precompress_bench.py [--hours 1 3 6 10] [--target-tokens 80000]
+        [--output precompress.json]
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from extractive import compress  # noqa: E402
+from summarizer import chunk_content, MAX_CHARS_PER_CHUNK, CHARS_PER_TOKEN  # noqa: E402
+
+WORDS_PER_MINUTE = 150
+
+TOPICS = {
+    "energy": "battery grid solar storage lithium inverter turbine capacity storage demand",
+    "biology": "protein enzyme genome mutation cell receptor membrane pathway expression",
+    "finance": "inflation bond yield equity valuation margin dividend liquidity treasury",
+    "compilers": "parser register bytecode optimizer inlining allocation pipeline lexer",
+    "climate": "emissions carbon warming ocean methane glacier forecast drought aerosol",
+    "robotics": "actuator sensor gripper trajectory controller torque kinematics lidar",
+}
+FILLER = [
+    "You know, I mean, it's like, yeah, so anyway.",
+    "Right, right, okay, so where was I going with that.",
+    "Um, yeah, that's kind of the thing, you know what I mean.",
+    "So, basically, like I said, it is what it is, honestly.",
+    "Anyway, let's keep going, we have a lot to get through today.",
+]
+CONNECTORS = "the new results show that|we measured how|the key point is that|" \
+             "researchers found that|in practice|the surprising part is that".split("|")
+
+def synthetic_transcript(minutes, rng, filler_rate=0.3, repeat_rate=0.15):
+    """(text, {kind: chars}) with informative, filler and repeated sentences"""
+    target_words = int(minutes * WORDS_PER_MINUTE)
+    sentences, kinds = [], {"informative": 0, "filler": 0, "repeat": 0}
+    words = 0
+    topics = list(TOPICS.values())
+
+    while words < target_words:
+        roll = rng.random()
+        if roll < filler_rate:
+            sentence, kind = rng.choice(FILLER), "filler"
+        elif roll < filler_rate + repeat_rate and sentences:
+            sentence, kind = rng.choice(sentences[-50:]), "repeat"
+        else:
+            topic = rng.choice(topics).split()
+            body = " ".join(rng.choice(topic) for _ in range(rng.randint(8, 16)))
+            sentence, kind = f"{rng.choice(CONNECTORS).capitalize()} {body}.", "informative"
+        sentences.append(sentence)
+        kinds[kind] += len(sentence)
+        words += len(sentence.split())
+
+    # Paragraphs of 5 sentences, like youtube_transcript.transcript_to_markdown
+    paragraphs = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return "\n\n".join(paragraphs), sentences
+
+def run(hours, target_tokens, seed):
+    rng = random.Random(seed)
+    results = []
+    for duration in hours:
+        content, sentences = synthetic_transcript(duration * 60, rng)
+        filler = set(FILLER)
+        filler_chars = sum(len(s) for s in sentences if s in filler)
+
+        compressed, report = compress(content, target_tokens * CHARS_PER_TOKEN)
+        kept_filler = sum(compressed.count(s) * len(s) for s in filler)
+
+        report.update(
+            hours=duration,
+            chunks_before=len(chunk_content(content)),
+            chunks_after=len(chunk_content(compressed)),
+            filler_share_before=round(filler_chars / len(content), 3),
+            filler_share_after=round(kept_filler / max(len(compressed), 1), 3),
+        )
+        results.append(report)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Extractive pre-compression benchmark")
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 3, 6, 10])
+    parser.add_argument("--target-tokens", type=int, default=80000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="save the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.hours, args.target_tokens, args.seed)
+
+    print(f"Target {args.target_tokens:,} tokens, chunks of {MAX_CHARS_PER_CHUNK:,} chars\n")
+    print(f"{'Hours':>6}{'Original':>12}{'Compressed':>12}{'Ratio':>7}{'Time (s)':>10}"
+          f"{'Chunks':>10}{'Filler':>14}")
+    for r in results:
+        print(f"{r['hours']:>6g}{r['original_chars']:>12,}{r['compressed_chars']:>12,}"
+              f"{r['ratio']:>7.0%}{r['seconds']:>10.2f}"
+              f"{r['chunks_before']:>5} -> {r['chunks_after']:<3}"
+              f"{r['filler_share_before']:>6.0%} -> {r['filler_share_after']:<4.0%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"target_tokens": args.target_tokens, "results": results}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
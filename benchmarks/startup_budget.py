@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget for the CLI entry points.
+
+Runs `python -X importtime -c "import <module>"` for each entry point,
+records the cumulative import time and fails when one goes over budget.
+
+Usage:
+    python benchmarks/startup_budget.py [--runs 5] [--output startup.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget in milliseconds per entry point (cumulative import time)
+BUDGETS_MS = {
+    "process_single": 250,
+    "process_all": 250,
+    "watcher": 250,
+    "webhook_server": 400,
+}
+
+def measure_import(module):
+    """Return (cumulative_ms, top_imports) for importing a module in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=REPO_DIR,
+    )
+    if result.returncode != 0:
+        raise Exception(f"import {module} failed:\n{result.stderr[-1000:]}")
+
+    # (depth, name, cumulative_us); children are listed before their parent
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative_us)))
+
+    index = next(i for i in range(len(entries) - 1, -1, -1)
+                 if entries[i][0] == 0 and entries[i][1] == module)
+    total_us = entries[index][2]
+
+    # Direct imports of the entry point, heaviest first
+    direct = []
+    for depth, name, cumulative_us in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            direct.append((name, cumulative_us))
+
+    direct.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000, direct[:4]
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget for entry points")
+    parser.add_argument("--runs", type=int, default=5, help="runs per entry point (best is kept)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    over_budget = []
+
+    print(f"{'Entry point':<16} {'Import (ms)':>12} {'Budget (ms)':>12}  Heaviest imports")
+    for module, budget_ms in BUDGETS_MS.items():
+        runs = [measure_import(module) for _ in range(args.runs)]
+        best_ms, heaviest = min(runs, key=lambda run: run[0])
+
+        results[module] = {"import_ms": round(best_ms, 1), "budget_ms": budget_ms}
+        status = "" if best_ms <= budget_ms else "  OVER BUDGET"
+        if status:
+            over_budget.append(module)
+
+        top = ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in heaviest)
+        print(f"{module:<16} {best_ms:>12.1f} {budget_ms:>12}  {top}{status}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved: {args.output}")
+
+    if over_budget:
+        print(f"\nFAILED: {', '.join(over_budget)} over budget")
+        sys.exit(1)
+    print("\nAll entry points within budget")
+
+if __name__ == "__main__":
+    main()
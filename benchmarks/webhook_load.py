@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Load test of the webhook server.
+
+Starts the real Flask app (with its job queue in a temporary directory and
+its warm worker pool) with the pipeline replaced by a stub job that sleeps
+or burns CPU, then POSTs /webhook/process in a steady, burst or ramp
+pattern. Records request latency percentiles, status codes, and, over time,
+server thread count, server and worker RSS and queue depth. The client runs
+in the same process as the server: its threads are left out of the thread
+count, but its memory is part of the server RSS.
+
+Admission limits come from the usual environment variables
+(MAX_QUEUED_JOBS, RATE_LIMIT_RPS, RATE_LIMIT_BURST, JOB_WORKERS), or from
+--rate-limit, --rate-burst and --max-queued; --no-limits turns them off to
+measure the server itself. Requests turned away with 429 are reported
+separately: latency percentiles and the accepted rate cover accepted
+requests only.
+
+Usage:
+    python benchmarks/webhook_load.py --pattern burst --rate 50 --duration 30
+        [--job-mode cpu --job-seconds 2] [--no-limits] [--output load.json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds between two resource samples
+SAMPLE_INTERVAL = 0.5
+
+# Client threads share the process with the server; excluded from thread counts
+CLIENT_THREAD_PREFIX = "load-client"
+
+def stub_job(page_id=None, url=None):
+    """Stand-in for the pipeline, run in the warm worker processes"""
+    seconds = float(os.getenv("LOADTEST_JOB_SECONDS", "1"))
+    if os.getenv("LOADTEST_JOB_MODE", "sleep") == "cpu":
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            sum(i * i for i in range(1000))
+    else:
+        time.sleep(seconds)
+    return True
+
+def rss_mb(pid):
+    """Resident set size of a process in MB (/proc, or ps on macOS)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)],
+                             capture_output=True, text=True).stdout.strip()
+        return round(int(out) / 1024, 1) if out else None
+    except (OSError, ValueError):
+        return None
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+def schedule(pattern, rate, duration, burst_size, burst_interval):
+    """Send offsets in seconds from the start of the test"""
+    if pattern == "steady":
+        count = int(rate * duration)
+        return [i / rate for i in range(count)]
+
+    if pattern == "burst":
+        offsets = []
+        at = 0.0
+        while at < duration:
+            offsets.extend([at] * burst_size)
+            at += burst_interval
+        return offsets
+
+    if pattern == "ramp":
+        # Rate grows linearly from 0 to `rate`: t(n) = sqrt(2 n duration / rate)
+        count = int(rate * duration / 2)
+        return [(2 * i * duration / rate) ** 0.5 for i in range(count)]
+
+    raise ValueError(f"Unknown pattern: {pattern}")
+
+class Sampler:
+    """Samples server threads, RSS and queue depth in the background"""
+
+    def __init__(self, server):
+        self.server = server
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            counts = self.server.job_queue.counts()
+            worker_rss = [rss_mb(w.process.pid) for w in self.server.workers
+                          if w.process is not None]
+            self.samples.append({
+                "t": round(time.perf_counter() - self.started, 2),
+                "threads": sum(1 for t in threading.enumerate()
+                               if not t.name.startswith(CLIENT_THREAD_PREFIX)),
+                "server_rss_mb": rss_mb(os.getpid()),
+                "workers_rss_mb": round(sum(r for r in worker_rss if r), 1),
+                "queued": counts.get("queued", 0),
+                "running": counts.get("running", 0),
+                "done": counts.get("done", 0),
+            })
+            self._stop.wait(SAMPLE_INTERVAL)
+
+def run(args):
+    os.environ["LOADTEST_JOB_MODE"] = args.job_mode
+    os.environ["LOADTEST_JOB_SECONDS"] = str(args.job_seconds)
+    sys.path.insert(0, REPO_DIR)
+
+    # Read by webhook_server at import
+    if args.no_limits:
+        args.rate_limit = args.max_queued = 0
+    if args.rate_limit is not None:
+        os.environ["RATE_LIMIT_RPS"] = str(args.rate_limit)
+    if args.rate_burst is not None:
+        os.environ["RATE_LIMIT_BURST"] = str(args.rate_burst)
+    if args.max_queued:
+        os.environ["MAX_QUEUED_JOBS"] = str(args.max_queued)
+
+    import requests
+    from werkzeug.serving import make_server
+    if not args.verbose:
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    import webhook_server
+    from job_queue import JobQueue
+
+    if args.max_queued == 0:
+        webhook_server.MAX_QUEUED_JOBS = None  # no cap on waiting jobs
+
+    workdir = tempfile.mkdtemp(prefix="webhook-load-")
+    webhook_server.job_queue = JobQueue(os.path.join(workdir, "queue.db"))
+    webhook_server.JOB_TARGET = stub_job
+
+    print(f"Starting {webhook_server.JOB_WORKERS} warm worker(s)...")
+    webhook_server.start_workers()
+    for worker in webhook_server.workers:
+        worker.wait_ready()
+
+    server = make_server("127.0.0.1", 0, webhook_server.app, threaded=True)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    offsets = schedule(args.pattern, args.rate, args.duration,
+                       args.burst_size, args.burst_interval)
+    print(f"{args.pattern}: {len(offsets)} requests over {args.duration}s "
+          f"({args.concurrency} client threads)")
+
+    local = threading.local()
+    results = []
+    results_lock = threading.Lock()
+
+    def send(index, offset):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+
+        delay = started + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        sent = time.perf_counter()
+        reason = None
+        try:
+            response = session.post(f"{base_url}/webhook/process", json={
+                "secret": webhook_server.WEBHOOK_SECRET,
+                "page_id": f"load-{index}",
+                "url": f"https://example.com/load/{index}",
+            }, timeout=args.timeout)
+            status = response.status_code
+            if status == 429:
+                reason = response.json().get("reason", "unknown")
+        except requests.RequestException as e:
+            status = type(e).__name__
+        latency = time.perf_counter() - sent
+
+        with results_lock:
+            results.append({"t": round(sent - started, 3), "status": status,
+                            "reason": reason, "latency": latency,
+                            "lag": max(0.0, -delay)})
+
+    sampler = Sampler(webhook_server)
+    sampler.start()
+    started = time.perf_counter()
+    output = sys.stdout if args.verbose else open(os.devnull, "w")
+    with contextlib.redirect_stdout(output):
+        with ThreadPoolExecutor(max_workers=args.concurrency,
+                                thread_name_prefix=CLIENT_THREAD_PREFIX) as pool:
+            for index, offset in enumerate(offsets):
+                pool.submit(send, index, offset)
+        load_seconds = time.perf_counter() - started
+
+        # Let the workers drain the queue
+        drain_deadline = time.perf_counter() + args.drain
+        while time.perf_counter() < drain_deadline:
+            counts = webhook_server.job_queue.counts()
+            if not counts.get("queued") and not counts.get("running"):
+                break
+            time.sleep(SAMPLE_INTERVAL)
+
+    sampler.stop()
+    server.shutdown()
+    webhook_server.stop_workers()
+    final_counts = webhook_server.job_queue.counts()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    accepted = [r for r in results if r["status"] in (200, 202)]
+    latencies = [r["latency"] for r in accepted]
+    rejected_latencies = [r["latency"] for r in results if r["status"] == 429]
+    statuses = {}
+    rejected = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+        if r["reason"]:
+            rejected[r["reason"]] = rejected.get(r["reason"], 0) + 1
+    samples = sampler.samples
+
+    def latency_ms(values):
+        return {
+            name: round(percentile(values, pct) * 1000, 2) if values else None
+            for name, pct in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99), ("max", 100))
+        }
+
+    return {
+        "config": vars(args),
+        "job_workers": webhook_server.JOB_WORKERS,
+        "max_queued_jobs": webhook_server.MAX_QUEUED_JOBS,
+        "rate_limit_rps": webhook_server.RATE_LIMIT_RPS,
+        "requests": len(results),
+        "load_seconds": round(load_seconds, 3),
+        "achieved_rps": round(len(results) / load_seconds, 2) if load_seconds else None,
+        "accepted": len(accepted),
+        "accepted_rps": round(len(accepted) / load_seconds, 2) if load_seconds else None,
+        "status_codes": statuses,
+        "rejected": rejected,
+        # Accepted requests only: 429s return before any queue work
+        "latency_ms": latency_ms(latencies),
+        "rejected_latency_ms": latency_ms(rejected_latencies),
+        "max_client_lag_ms": round(max((r["lag"] for r in results), default=0) * 1000, 2),
+        "jobs": final_counts,
+        "peak": {
+            "threads": max((s["threads"] for s in samples), default=None),
+            "server_rss_mb": max((s["server_rss_mb"] or 0 for s in samples), default=None),
+            "workers_rss_mb": max((s["workers_rss_mb"] for s in samples), default=None),
+            "queued": max((s["queued"] for s in samples), default=None),
+        },
+        "timeline": samples,
+    }
+
+def print_report(result):
+    limits = (f"queue cap {result['max_queued_jobs'] or 'off'}, "
+              f"rate limit {result['rate_limit_rps'] or 'off'} req/s")
+    print(f"\n{result['requests']} requests in {result['load_seconds']}s "
+          f"({result['achieved_rps']} req/s), {result['job_workers']} worker(s), {limits}")
+    print("Status codes: " + ", ".join(f"{code}: {n}" for code, n in
+                                        sorted(result["status_codes"].items())))
+    print(f"Accepted: {result['accepted']} ({result['accepted_rps']} req/s)")
+    latency = result["latency_ms"]
+    print(f"Latency (ms, accepted): p50 {latency['p50']}  p90 {latency['p90']}  "
+          f"p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    if result["rejected"]:
+        rejected = ", ".join(f"{reason}: {n}" for reason, n in sorted(result["rejected"].items()))
+        latency = result["rejected_latency_ms"]
+        print(f"Rejected (429): {rejected}; latency (ms) p50 {latency['p50']}  "
+              f"p99 {latency['p99']}")
+    peak = result["peak"]
+    print(f"Peak: {peak['threads']} threads, server RSS {peak['server_rss_mb']} MB, "
+          f"workers RSS {peak['workers_rss_mb']} MB, {peak['queued']} queued")
+    print("Jobs: " + ", ".join(f"{status}: {n}" for status, n in sorted(result["jobs"].items())))
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook server load test")
+    parser.add_argument("--pattern", choices=("steady", "burst", "ramp"), default="steady")
+    parser.add_argument("--rate", type=float, default=10,
+                        help="requests/s (steady), peak requests/s (ramp)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load")
+    parser.add_argument("--burst-size", type=int, default=50, help="requests per burst")
+    parser.add_argument("--burst-interval", type=float, default=5, help="seconds between bursts")
+    parser.add_argument("--concurrency", type=int, default=32, help="client threads")
+    parser.add_argument("--timeout", type=float, default=30, help="request timeout")
+    parser.add_argument("--job-mode", choices=("sleep", "cpu"), default="sleep")
+    parser.add_argument("--job-seconds", type=float, default=1.0, help="duration of a stub job")
+    parser.add_argument("--rate-limit", type=float,
+                        help="webhook requests/s per client (0: off; default RATE_LIMIT_RPS)")
+    parser.add_argument("--rate-burst", type=int, help="rate limit burst (default RATE_LIMIT_BURST)")
+    parser.add_argument("--max-queued", type=int,
+                        help="jobs allowed to wait (0: no cap; default MAX_QUEUED_JOBS)")
+    parser.add_argument("--no-limits", action="store_true",
+                        help="turn off the rate limit and the queue cap")
+    parser.add_argument("--drain", type=float, default=0,
+                        help="seconds to wait for queued jobs after the load")
+    parser.add_argument("--output", help="save the result (with the timeline) as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show server and job logs")
+    args = parser.parse_args()
+
+    result = run(args)
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
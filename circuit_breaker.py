@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Circuit breakers for the external dependencies (Notion, Drive, TTS,
+YouTube, LLM).
+
+A breaker opens after BREAKER_FAILURES consecutive failures of its
+dependency; calls through it then fail fast with CircuitOpen. After
+BREAKER_RESET_SECONDS it goes half-open: one probe call is let through,
+and its outcome closes the breaker or opens it again.
+
+State lives in a small SQLite table (.jobs/breakers.db) so the warm worker
+processes, the watcher and the webhook server's /health all see the same
+breakers. Every state change is logged.
+"""
+
+import os
+import time
+import sqlite3
+from contextlib import closing, contextmanager
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs", "breakers.db")
+
+# Consecutive failures that open a breaker, and seconds before it goes half-open
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "120"))
+
+DEPENDENCIES = ("notion", "drive", "tts", "youtube", "llm")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS breakers (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'closed',
+    failures INTEGER NOT NULL DEFAULT 0,
+    opened_at REAL,
+    probe_at REAL,
+    last_error TEXT,
+    changed_at REAL
+)
+"""
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+    def __init__(self, name, retry_in):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"{name} circuit open (retry in {retry_in:.0f}s)")
+
+_initialized = set()
+
+def _connect():
+    path = DB_PATH
+    if path not in _initialized:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(sqlite3.connect(path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            conn.commit()
+        _initialized.add(path)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _row(conn, name):
+    row = conn.execute("SELECT * FROM breakers WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        return {'name': name, 'state': CLOSED, 'failures': 0, 'opened_at': None,
+                'probe_at': None, 'last_error': None, 'changed_at': None}
+    return dict(row)
+
+def _save(conn, record, old_state, reason):
+    if record['state'] != old_state:
+        record['changed_at'] = time.time()
+        print(f"Circuit breaker {record['name']}: {old_state} -> {record['state']} ({reason})")
+    conn.execute(
+        "INSERT OR REPLACE INTO breakers (name, state, failures, opened_at, probe_at, "
+        "last_error, changed_at) VALUES (:name, :state, :failures, :opened_at, :probe_at, "
+        ":last_error, :changed_at)",
+        record,
+    )
+
+def http_outage(status_code):
+    """True for HTTP statuses that mean the dependency is unusable, not the request"""
+    return status_code in (401, 403, 429) or status_code >= 500
+
+def _retry_in(record, now):
+    started = record['opened_at'] if record['state'] == OPEN else record['probe_at']
+    return max((started or now) + BREAKER_RESET_SECONDS - now, 0)
+
+def allow(name):
+    """
+    Let a call through, or raise CircuitOpen.
+
+    Past the reset timeout an open breaker turns half-open and this call is
+    its probe; other calls are refused until the probe reports back (or
+    itself times out, if its process died).
+    """
+    now = time.time()
+    with closing(_connect()) as conn:
+        if _row(conn, name)['state'] == CLOSED:
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            record = _row(conn, name)
+            old_state = record['state']
+            if old_state != CLOSED:
+                if _retry_in(record, now) > 0:
+                    raise CircuitOpen(name, _retry_in(record, now))
+                record['state'] = HALF_OPEN
+                record['probe_at'] = now
+                _save(conn, record, old_state, "probing")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+def record_success(name):
+    """Reset the failure count; a successful probe closes the breaker"""
+    with closing(_connect()) as conn:
+        row = conn.execute("SELECT state, failures FROM breakers WHERE name = ?",
+                           (name,)).fetchone()
+        if row is None or (row['state'] == CLOSED and row['failures'] == 0):
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        record = _row(conn, name)
+        old_state = record['state']
+        record.update(state=CLOSED, failures=0, opened_at=None, probe_at=None)
+        _save(conn, record, old_state, "call succeeded")
+        conn.execute("COMMIT")
+
+def record_failure(name, error=None):
+    """Count a failure; opens the breaker at the threshold or on a failed probe"""
+    now = time.time()
+    with closing(_connect()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        record = _row(conn, name)
+        old_state = record['state']
+        record['failures'] += 1
+        record['last_error'] = str(error)[:500] if error else None
+        if old_state == HALF_OPEN or record['failures'] >= BREAKER_FAILURES:
+            record.update(state=OPEN, opened_at=now, probe_at=None)
+            reason = ("probe failed" if old_state == HALF_OPEN
+                      else f"{record['failures']} consecutive failures")
+        else:
+            reason = None
+        _save(conn, record, old_state, f"{reason}: {record['last_error']}")
+        conn.execute("COMMIT")
+
+class _Call:
+    """Handle yielded by guard(): fail() marks a call that returned an error"""
+
+    def __init__(self):
+        self.error = None
+
+    def fail(self, error):
+        self.error = error
+
+@contextmanager
+def guard(name, ignore=()):
+    """
+    Run a dependency call through its breaker.
+
+    Exceptions count as failures, except `ignore` types (errors about the
+    content, not the dependency). Calls that report errors without raising
+    use the yielded handle: call.fail(reason).
+    """
+    allow(name)
+    call = _Call()
+    try:
+        yield call
+    except ignore:
+        record_success(name)
+        raise
+    except Exception as e:
+        record_failure(name, e)
+        raise
+    if call.error is not None:
+        record_failure(name, call.error)
+    else:
+        record_success(name)
+
+def blocked(names=DEPENDENCIES):
+    """(name, retry_in) of the first open breaker among names, or None"""
+    now = time.time()
+    with closing(_connect()) as conn:
+        for name in names:
+            record = _row(conn, name)
+            if record['state'] != CLOSED and _retry_in(record, now) > 0:
+                return name, _retry_in(record, now)
+    return None
+
+def states():
+    """{name: state record} of every dependency, for /health"""
+    now = time.time()
+    with closing(_connect()) as conn:
+        records = {name: _row(conn, name) for name in DEPENDENCIES}
+    return {
+        name: {
+            'state': record['state'],
+            'failures': record['failures'],
+            'retry_in': round(_retry_in(record, now), 1) if record['state'] != CLOSED else None,
+            'last_error': record['last_error'],
+            'changed_at': record['changed_at'],
+        }
+        for name, record in records.items()
+    }
@@ -1,11 +1,10 @@
 import os
 import pickle
+import threading
 from dotenv import load_dotenv
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from tracing import span
+import circuit_breaker
+import artifact_store
 
 load_dotenv()
 
@@ -13,12 +12,26 @@ SCOPES = ['https://www.googleapis.com/auth/drive.file']
 GDRIVE_FOLDER_ID = os.getenv("GDRIVE_FOLDER_ID")
 GDRIVE_CREDENTIALS_PATH = os.getenv("GDRIVE_CREDENTIALS_PATH", "credentials.json")
 
+# Credentials are shared; the service is built once per thread (httplib2
+# isn't thread-safe) and reused while the credentials stay valid
+_creds = None
+_local = threading.local()
+
 def get_drive_service():
     """Authenticate and return Google Drive service"""
-    creds = None
+    global _creds
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
+    service = getattr(_local, 'service', None)
+    if service is not None and _creds is not None and _creds.valid:
+        return service
+
+    creds = _creds
 
     # Token from previous auth
-    if os.path.exists('token.pickle'):
+    if creds is None and os.path.exists('token.pickle'):
         with open('token.pickle', 'rb') as token:
             creds = pickle.load(token)
 
@@ -41,7 +54,9 @@ def get_drive_service():
         with open('token.pickle', 'wb') as token:
             pickle.dump(creds, token)
 
-    return build('drive', 'v3', credentials=creds)
+    _creds = creds
+    _local.service = build('drive', 'v3', credentials=creds)
+    return _local.service
 
 def get_mimetype(filepath):
     """Detect MIME type based on file extension"""
@@ -59,35 +74,40 @@ def get_mimetype(filepath):
 
 def upload_to_drive(filepath, folder_id=None):
     """Upload a file to Google Drive and return the shareable link"""
+    from googleapiclient.http import MediaFileUpload
+
     if folder_id is None:
         folder_id = GDRIVE_FOLDER_ID
 
-    service = get_drive_service()
-
-    filename = os.path.basename(filepath)
-    mimetype = get_mimetype(filepath)
+    filename = artifact_store.display_name(filepath)
+    mimetype = get_mimetype(filename)
 
     file_metadata = {
         'name': filename,
         'parents': [folder_id]
     }
 
-    media = MediaFileUpload(filepath, mimetype=mimetype, resumable=True)
-
-    file = service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields='id, webViewLink'
-    ).execute()
-
-    file_id = file.get('id')
-    web_link = file.get('webViewLink')
-
-    # Make file accessible via link
-    service.permissions().create(
-        fileId=file_id,
-        body={'type': 'anyone', 'role': 'reader'}
-    ).execute()
+    # Authentication counts against the breaker too (expired or revoked token)
+    with artifact_store.plain_file(filepath) as path, \
+            span("upload", filename=filename, mimetype=mimetype, bytes=os.path.getsize(path)), \
+            circuit_breaker.guard("drive"):
+        service = get_drive_service()
+        media = MediaFileUpload(path, mimetype=mimetype, resumable=True)
+
+        file = service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id, webViewLink'
+        ).execute()
+
+        file_id = file.get('id')
+        web_link = file.get('webViewLink')
+
+        # Make file accessible via link
+        service.permissions().create(
+            fileId=file_id,
+            body={'type': 'anyone', 'role': 'reader'}
+        ).execute()
 
     print(f"Uploaded: {filename}")
     print(f"Link: {web_link}")
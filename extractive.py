@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Local extractive pre-compression of oversized content (NumPy TF-IDF).
+
+Sentences are scored by the cosine similarity of their TF-IDF vector to the
+document centroid, then picked greedily by maximal marginal relevance
+(relevance minus similarity to what is already kept) until the character
+budget is used. Filler scores low and repetitions are penalized, so long
+rambling transcripts shrink before they are chunked and sent to the LLM.
+Kept sentences stay in their original order and paragraphs. If the selection
+comes out empty or far under budget, the content is returned unchanged.
+"""
+
+import re
+import time
+from collections import Counter
+
+# Terms kept in the TF-IDF matrix (most frequent across sentences first);
+# bounds memory at sentences x MAX_FEATURES float32
+MAX_FEATURES = 2048
+
+# Relevance vs. novelty trade-off in the MMR selection
+MMR_LAMBDA = 0.7
+
+# Sentences picked per MMR step before similarities are updated
+MMR_BATCH = 16
+
+# Sentences shorter than this are not scored (fragments, "Yeah.")
+MIN_SENTENCE_WORDS = 4
+
+# Longer sentences (auto-captions with little punctuation) are cut into
+# windows of this many words, so each can be scored and kept on its own
+MAX_SENTENCE_WORDS = 80
+
+# A selection filling less of the budget than this is not used: the content
+# is returned unchanged rather than losing most of it
+MIN_FILL = 0.5
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?…])\s+')
+WORD = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+
+STOPWORDS = set("""
+the and for are but not you all any can had her was one our out his has him how its may new
+now old see two who did get got let put say she too use that this with have from they will
+would there their what about which when make like time just know take into year your good
+some could them than then look only come over also back after work first well even want
+because these give most very yeah okay right really thing things gonna going actually
+basically literally kind sort mean maybe something pretty lot stuff said says think
+les des une est pas pour que qui dans sur avec par plus mais ont son ses aux tout cette
+comme elle nous vous leur sont été être fait bien aussi donc alors voilà quoi ça
+""".split())
+
+def split_sentences(content):
+    """[(paragraph_index, sentence)] in document order"""
+    sentences = []
+    for index, paragraph in enumerate(content.split('\n\n')):
+        for sentence in SENTENCE_SPLIT.split(paragraph.strip()):
+            words = sentence.split()
+            for start in range(0, len(words), MAX_SENTENCE_WORDS):
+                sentences.append((index, ' '.join(words[start:start + MAX_SENTENCE_WORDS])))
+    return sentences
+
+def _tfidf_matrix(tokens):
+    """Row-normalized TF-IDF matrix (float32) over the MAX_FEATURES most common terms"""
+    import numpy as np
+
+    document_frequency = Counter()
+    for words in tokens:
+        document_frequency.update(set(words))
+    vocabulary = {term: i for i, (term, _) in
+                  enumerate(document_frequency.most_common(MAX_FEATURES))}
+
+    rows, cols, counts = [], [], []
+    for row, words in enumerate(tokens):
+        for term, count in Counter(w for w in words if w in vocabulary).items():
+            rows.append(row)
+            cols.append(vocabulary[term])
+            counts.append(count)
+
+    matrix = np.zeros((len(tokens), len(vocabulary)), dtype=np.float32)
+    matrix[rows, cols] = counts
+
+    df = np.array([document_frequency[term] for term in vocabulary], dtype=np.float32)
+    idf = np.log((1 + len(tokens)) / (1 + df)) + 1
+    matrix = np.log1p(matrix) * idf
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+def _select(matrix, lengths, budget):
+    """Indices of the sentences kept by batched MMR within a character budget"""
+    import numpy as np
+
+    centroid = matrix.mean(axis=0)
+    norm = np.linalg.norm(centroid)
+    relevance = matrix @ (centroid / norm) if norm else np.zeros(len(matrix), dtype=np.float32)
+
+    lengths = np.asarray(lengths)
+    max_similarity = np.zeros(len(matrix), dtype=np.float32)
+    available = np.ones(len(matrix), dtype=bool)
+    selected = []
+    used = 0
+
+    # A sentence that doesn't fit in what is left of the budget is skipped,
+    # and the next best ones keep filling it
+    while True:
+        available &= lengths <= budget - used
+        if not available.any():
+            break
+        score = MMR_LAMBDA * relevance - (1 - MMR_LAMBDA) * max_similarity
+        score[~available] = -np.inf
+        batch = []
+        for index in np.argsort(-score)[:MMR_BATCH]:
+            if not available[index]:
+                break
+            available[index] = False
+            if used + lengths[index] > budget:
+                continue
+            batch.append(index)
+            used += lengths[index]
+        if not batch:
+            continue
+        selected.extend(batch)
+        similarity = (matrix @ matrix[batch].T).max(axis=1)
+        np.maximum(max_similarity, similarity, out=max_similarity)
+
+    return sorted(selected)
+
+def compress(content, target_chars):
+    """
+    Shrink content to about target_chars by keeping its most informative,
+    least redundant sentences.
+
+    Returns (compressed_content, report) where report holds the original and
+    compressed sizes, the ratio, sentence counts and the time taken.
+    """
+    started = time.perf_counter()
+    sentences = split_sentences(content)
+    report = {
+        'original_chars': len(content),
+        'sentences': len(sentences),
+    }
+
+    def unchanged(reason=None):
+        report.update(compressed_chars=len(content), ratio=1.0,
+                      kept_sentences=len(sentences),
+                      seconds=round(time.perf_counter() - started, 3))
+        if reason:
+            report['fallback'] = reason
+        return content, report
+
+    if len(content) <= target_chars or len(sentences) < 2:
+        return unchanged()
+
+    tokens = [[w for w in (m.group().lower() for m in WORD.finditer(sentence))
+               if w not in STOPWORDS]
+              for _, sentence in sentences]
+
+    # Fragments are never kept (they only read well next to their neighbours),
+    # and neither are verbatim repetitions of an earlier sentence
+    scored, seen = [], set()
+    for i, words in enumerate(tokens):
+        text = sentences[i][1].lower()
+        if words and len(text.split()) >= MIN_SENTENCE_WORDS and text not in seen:
+            scored.append(i)
+            seen.add(text)
+    if not scored:
+        return unchanged("no sentence could be scored")
+
+    matrix = _tfidf_matrix([tokens[i] for i in scored])
+    lengths = [len(sentences[i][1]) + 1 for i in scored]
+    kept = [scored[i] for i in _select(matrix, lengths, target_chars)]
+
+    paragraphs = {}
+    for index in kept:
+        paragraph, sentence = sentences[index]
+        paragraphs.setdefault(paragraph, []).append(sentence)
+    compressed = '\n\n'.join(' '.join(group) for _, group in sorted(paragraphs.items()))
+
+    if len(compressed) < target_chars * MIN_FILL:
+        return unchanged(f"selection filled {len(compressed):,} of {target_chars:,} chars")
+
+    report.update(
+        compressed_chars=len(compressed),
+        ratio=round(len(compressed) / len(content), 3),
+        kept_sentences=len(kept),
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    return compressed, report
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Hedged subprocess calls for the summarizer's `claude -p` invocations.
+
+A few calls hang for minutes while most finish in seconds. Each kind of call
+("summarize_chunk", "merge") keeps its recent successful latencies; once a
+call has run longer than the HEDGE_PERCENTILE of those, an identical second
+process is started. The first one to succeed wins and the other is killed
+with its whole process group. At most HEDGE_MAX_IN_FLIGHT hedges run at once
+in a process, so a slow upstream can't double the load across the board.
+
+A call that fails is not hedged (retries are the caller's business), and no
+hedge is sent until HEDGE_MIN_SAMPLES latencies are known.
+
+Latency grows with the input, so calls pass their input size: a call is
+compared with past calls of a similar size (within a factor of 4) once there
+are enough of them, and until then the overall percentile is scaled up by
+its size relative to the median. A 300K-char video chunk is not hedged
+against the latencies of 2K-char articles.
+
+The history of each kind is seeded from the span log (see tracing) the first
+time it is used in a process, so a one-shot process_all or process_single run,
+or a restarted server, hedges from its first call instead of waiting for
+HEDGE_MIN_SAMPLES new calls.
+"""
+
+import os
+import time
+import queue
+import signal
+import threading
+import subprocess
+from collections import deque
+import tracing
+
+HEDGING = os.getenv("HEDGE_REQUESTS", "1") == "1"
+
+# Latency percentile of recent calls after which a hedge is sent
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+
+# Hedges running at once (per process)
+HEDGE_MAX_IN_FLIGHT = int(os.getenv("HEDGE_MAX_IN_FLIGHT", "2"))
+
+# Latencies needed before hedging, and how many recent ones are kept
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = 200
+
+# Never hedge a call younger than this (seconds)
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "10"))
+
+# While too few latencies are known or every hedge slot is taken, a running
+# call checks again this often
+RECHECK_INTERVAL = 5
+
+def _size_bucket(size):
+    """Input sizes within a factor of 4 share a bucket"""
+    return max(int(size), 1).bit_length() // 2
+
+def _percentile(latencies):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * HEDGE_PERCENTILE / 100))]
+
+class LatencyTracker:
+    """Recent successful latencies of one kind of call, with their input sizes"""
+
+    def __init__(self, window=HEDGE_WINDOW, samples=()):
+        self._samples = deque(samples, maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, size=None):
+        with self._lock:
+            self._samples.append((seconds, size))
+
+    def hedge_delay(self, size=None):
+        """Seconds after which to hedge a call of this size, or None with too few samples"""
+        with self._lock:
+            samples = list(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+
+        if size:
+            bucket = _size_bucket(size)
+            similar = [seconds for seconds, n in samples if n and _size_bucket(n) == bucket]
+            if len(similar) >= HEDGE_MIN_SAMPLES:
+                return max(_percentile(similar), HEDGE_MIN_DELAY)
+
+        delay = _percentile(seconds for seconds, _ in samples)
+        sizes = sorted(n for _, n in samples if n)
+        if size and sizes:
+            # Never scaled down: a small call is at worst hedged later
+            delay *= max(size / sizes[len(sizes) // 2], 1.0)
+        return max(delay, HEDGE_MIN_DELAY)
+
+trackers = {}
+_trackers_lock = threading.Lock()
+_hedges = threading.BoundedSemaphore(max(HEDGE_MAX_IN_FLIGHT, 1))
+
+def _logged_latencies(kind):
+    """(seconds, size) of the recent successful, unhedged calls of this kind in the span log"""
+    samples = []
+    for record in tracing.recent_spans(kind, HEDGE_WINDOW):
+        attrs = record.get('attrs') or {}
+        # A hedged span lasts until the winner answered, not one call's latency
+        if record.get('status') == "ok" and not attrs.get('hedged'):
+            samples.append((record['duration'], attrs.get('input_chars')))
+    return samples
+
+def tracker(kind):
+    with _trackers_lock:
+        if kind not in trackers:
+            trackers[kind] = LatencyTracker(samples=_logged_latencies(kind))
+        return trackers[kind]
+
+class _Attempt:
+    """One subprocess, waited on by a daemon thread that reports to `results`"""
+
+    def __init__(self, args, deadline, results):
+        self.started = time.monotonic()
+        # Own process group, so killing it also kills the CLI's children
+        self.process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        text=True, start_new_session=True)
+        threading.Thread(target=self._wait, args=(deadline, results), daemon=True).start()
+
+    def _wait(self, deadline, results):
+        timed_out = False
+        try:
+            stdout, stderr = self.process.communicate(
+                timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            self.kill()
+            stdout, stderr = self.process.communicate()
+        results.put((self, stdout, stderr, timed_out))
+
+    def kill(self):
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                self.process.kill()
+
+def run(args, kind, timeout=300, attrs=None, size=None):
+    """
+    subprocess.run(args, capture_output=True, text=True, timeout=timeout),
+    with a hedge sent if the call turns out slow.
+
+    kind: latency history to use ("summarize_chunk", "merge")
+    size: input size (chars), compared with the sizes of past calls
+    attrs: optional span attributes, set to hedged=True/False and, when
+    hedged, hedge_won and hedge_delay
+    """
+    history = tracker(kind)
+    hedging = HEDGING and HEDGE_MAX_IN_FLIGHT > 0
+    delay = None
+    deadline = time.monotonic() + timeout
+    results = queue.Queue()
+    attempts = [_Attempt(args, deadline, results)]
+    hedge_slot = False
+    not_before = 0        # next hedge attempt when every slot was taken
+    finished = 0
+    outcome = None
+
+    try:
+        while True:
+            wait = None
+            if hedging and len(attempts) == 1:
+                delay = history.hedge_delay(size)
+                wait = (RECHECK_INTERVAL if delay is None
+                        else max(attempts[0].started + delay, not_before) - time.monotonic())
+                wait = max(wait, 0)
+            try:
+                attempt, stdout, stderr, timed_out = results.get(timeout=wait)
+            except queue.Empty:
+                if delay is None:
+                    continue
+                if _hedges.acquire(blocking=False):
+                    hedge_slot = True
+                    print(f"  [{kind}] no answer after {delay:.0f}s, sending a hedge")
+                    attempts.append(_Attempt(args, deadline, results))
+                else:
+                    not_before = time.monotonic() + RECHECK_INTERVAL
+                continue
+
+            finished += 1
+            returncode = attempt.process.returncode
+            if returncode == 0 and not timed_out:
+                history.record(time.monotonic() - attempt.started, size)
+                outcome = subprocess.CompletedProcess(args, returncode, stdout, stderr)
+                break
+            if finished == len(attempts):
+                if timed_out:
+                    raise subprocess.TimeoutExpired(args, timeout, stdout, stderr)
+                outcome = subprocess.CompletedProcess(args, returncode, stdout, stderr)
+                break
+    finally:
+        for running in attempts:
+            running.kill()
+        if hedge_slot:
+            _hedges.release()
+
+    if attrs is not None:
+        attrs['hedged'] = len(attempts) > 1
+        if len(attempts) > 1:
+            attrs['hedge_won'] = attempt is attempts[1]
+            attrs['hedge_delay'] = round(delay, 3)
+    return outcome
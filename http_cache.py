@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Pooled HTTP fetching with an on-disk conditional-GET cache.
+
+Responses are cached under .cache/http/ with their ETag / Last-Modified
+validators, so re-fetching an unchanged page costs a 304.
+"""
+
+import os
+import json
+import hashlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "http")
+
+# Refuse bodies larger than this (articles are a few hundred KB at most)
+MAX_BODY_BYTES = int(os.getenv("HTTP_MAX_BODY_MB", "10")) * 1024 * 1024
+FETCH_TIMEOUT = 30
+USER_AGENT = "Mozilla/5.0 (compatible; transcript-pipeline)"
+
+_session = None
+
+def get_session():
+    """Shared session with connection pooling and retries on transient errors"""
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "HEAD"],
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry)
+        _session = requests.Session()
+        _session.headers['User-Agent'] = USER_AGENT
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+def _cache_paths(url):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.json"), os.path.join(CACHE_DIR, f"{key}.body")
+
+def load_cached(url):
+    """Return (meta, body) for a cached URL, or (None, None)"""
+    meta_path, body_path = _cache_paths(url)
+    if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+        return None, None
+
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            body = f.read()
+    except (OSError, json.JSONDecodeError):
+        return None, None
+
+    return meta, body
+
+def conditional_headers(meta):
+    """Build If-None-Match / If-Modified-Since headers from cached validators"""
+    headers = {}
+    if meta:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def store_response(url, headers, body):
+    """Cache a 200 response if it carries a validator"""
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    meta_path, body_path = _cache_paths(url)
+    meta = {
+        'url': url,
+        'etag': etag,
+        'last_modified': last_modified,
+        'content_type': headers.get('Content-Type'),
+        'size': len(body),
+    }
+    # Body first, so a meta file always points at a complete body
+    _write_atomic(body_path, body)
+    _write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+def fetch(url, timeout=FETCH_TIMEOUT, max_bytes=MAX_BODY_BYTES):
+    """
+    GET a URL through the shared session and the on-disk cache.
+
+    Returns the body as bytes. Raises if the server errors or the body
+    exceeds max_bytes.
+    """
+    meta, cached_body = load_cached(url)
+
+    with get_session().get(url, headers=conditional_headers(meta), stream=True,
+                           timeout=timeout) as response:
+        if response.status_code == 304 and cached_body is not None:
+            print(f"Not modified (cached): {url}")
+            return cached_body
+
+        response.raise_for_status()
+
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > max_bytes:
+            raise Exception(f"Response too large ({int(length)} bytes): {url}")
+
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > max_bytes:
+                raise Exception(f"Response exceeds {max_bytes} bytes: {url}")
+            chunks.append(chunk)
+        body = b''.join(chunks)
+
+        store_response(url, response.headers, body)
+
+    return body
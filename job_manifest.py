@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Job manifests so a retried entry resumes instead of restarting.
+
+Manifests are keyed by the canonical content key (see url_canon), so every
+Notion page pointing at the same content shares one manifest. Each finished
+stage is recorded in .jobs/<key>.json with its outputs, the content hash of
+every artifact it wrote, and its timing. A retry (or another page with the
+same content) skips every stage whose artifacts are still on disk and
+unchanged. Once the results are uploaded, the content's own job may skip the
+stages before the upload even if their local files were evicted (see
+artifact_store and uploaded_stage): a new page for old content only needs the
+Drive links. Pages updated in Notion by the
+current attempt are listed under 'pages_done': a page handed to a new job is
+pending in Notion again, so it is taken off the list when the job starts.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+
+MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs")
+
+# Stage whose outputs (Drive links) no longer depend on local files
+DELIVERY_STAGE = "upload"
+
+def file_sha256(path):
+    """Content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _manifest_path(key):
+    safe_key = re.sub(r'[^A-Za-z0-9._-]+', '_', key)[:80]
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(MANIFEST_DIR, f"{safe_key}-{digest}.json")
+
+def load_manifest(key, url):
+    """Load the manifest for a content key (a fresh one if missing)"""
+    path = _manifest_path(key)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    return {'key': key, 'url': url, 'stages': {}, 'pages_done': []}
+
+def save_manifest(manifest):
+    """Write the manifest atomically"""
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    path = _manifest_path(manifest['key'])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def completed_stage(manifest, stage):
+    """
+    Return the recorded outputs of a finished stage, or None if it must run.
+
+    A stage only counts as done if all of its artifacts still exist with the
+    recorded content hash.
+    """
+    record = manifest['stages'].get(stage)
+    if not record:
+        return None
+
+    for artifact in record.get('artifacts', {}).values():
+        path = artifact['path']
+        if not os.path.exists(path) or file_sha256(path) != artifact['sha256']:
+            return None
+
+    return record['outputs']
+
+def uploaded_stage(manifest, stage):
+    """
+    Return the recorded outputs of a stage finished before the delivery stage,
+    even if its artifacts were evicted since, or None.
+
+    Only for the content's own job, which needs nothing but the Drive links
+    from then on: the file outputs may point at files that no longer exist.
+    """
+    stages = manifest['stages']
+    if stage not in stages or DELIVERY_STAGE not in stages:
+        return None
+    order = list(stages)
+    if order.index(stage) < order.index(DELIVERY_STAGE):
+        return stages[stage]['outputs']
+    return None
+
+def record_stage(manifest, stage, outputs, artifacts=(), started_at=None):
+    """
+    Record a finished stage and save the manifest.
+
+    outputs: values to restore on retry (paths, links, title...)
+    artifacts: keys of outputs that are files to hash
+    """
+    finished_at = time.time()
+    started_at = started_at or finished_at
+
+    # A re-run stage invalidates everything recorded after it
+    stages = manifest['stages']
+    if stage in stages:
+        order = list(stages)
+        for later in order[order.index(stage) + 1:]:
+            del stages[later]
+        del stages[stage]
+
+    stages[stage] = {
+        'outputs': outputs,
+        'artifacts': {
+            key: {'path': outputs[key], 'sha256': file_sha256(outputs[key])}
+            for key in artifacts
+        },
+        'started_at': started_at,
+        'finished_at': finished_at,
+        'duration': round(finished_at - started_at, 3),
+    }
+    save_manifest(manifest)
+
+def stage_timings(key, since=None):
+    """Return {stage: duration_seconds} from a manifest (stages finished after since)"""
+    path = _manifest_path(key)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return {
+        stage: record.get('duration')
+        for stage, record in manifest['stages'].items()
+        if since is None or record.get('finished_at', 0) >= since
+    }
+
+def page_done(manifest, page_id):
+    """True if this Notion page was already updated with the results"""
+    return page_id in manifest.get('pages_done', [])
+
+def reset_pages(manifest, page_ids):
+    """Forget earlier updates of pages a new job was started for"""
+    page_ids = set(page_ids)
+    pages_done = manifest.get('pages_done', [])
+    remaining = [page_id for page_id in pages_done if page_id not in page_ids]
+    if len(remaining) != len(pages_done):
+        manifest['pages_done'] = remaining
+        save_manifest(manifest)
+
+def record_page_done(manifest, page_id):
+    """Remember that a Notion page got the results, and save the manifest"""
+    pages_done = manifest.setdefault('pages_done', [])
+    if page_id not in pages_done:
+        pages_done.append(page_id)
+    save_manifest(manifest)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Durable local job queue backed by SQLite.
+
+Jobs survive server restarts. Delivery is at-least-once: a claimed job holds
+a lease, and a job whose worker died is handed out again once the lease
+expires. Jobs are deduplicated by key (the Notion page_id), so only one job
+per page is queued or running at a time, and a job for content that another
+job is already processing (same canonical URL) waits until that one finishes,
+then resumes from its checkpoints.
+
+Full runs ("process all") are single-flight: while one runs, further triggers
+collapse into a single queued follow-up run, which starts once it finishes.
+"""
+
+import os
+import time
+import sqlite3
+from contextlib import closing
+from url_canon import canonical_key
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs", "queue.db")
+
+# Per-job timeout of the warm workers in seconds (long videos can take a while);
+# warm_worker imports it from here
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", "3600"))
+
+# A claimed job is handed out again if not completed within this many seconds:
+# JOB_TIMEOUT plus time for a worker restart and warm-up, so a job still
+# running is never claimed twice. JOB_LEASE_SECONDS can only lengthen it.
+LEASE_MARGIN = 300
+LEASE_SECONDS = max(int(os.getenv("JOB_LEASE_SECONDS", "0")), JOB_TIMEOUT + LEASE_MARGIN)
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 60  # seconds, doubled per attempt
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedup_key TEXT NOT NULL,
+    content_key TEXT,
+    page_id TEXT,
+    url TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs(status, available_at, id);
+CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs(dedup_key, status);
+"""
+
+ACTIVE = ('queued', 'running')
+
+# dedup_key and content_key of full runs
+ALL_KEY = "__all__"
+
+class QueueFull(Exception):
+    """Raised by enqueue when max_queued jobs are already waiting"""
+
+class JobQueue:
+    """SQLite-backed job queue (one short-lived connection per call, thread-safe)"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'content_key' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN content_key TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_content ON jobs(content_key, status)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, page_id=None, url=None, max_queued=None):
+        """
+        Add a job unless one with the same key is already queued or running.
+
+        Without a page_id, queues a full run (see enqueue_all). Raises
+        QueueFull if a new job would exceed max_queued waiting jobs.
+        Returns (job_id, created).
+        """
+        if not page_id:
+            job_id, created, _ = self.enqueue_all(max_queued)
+            return job_id, created
+
+        return self._enqueue(page_id, canonical_key(url), page_id, url, ACTIVE, max_queued)[:2]
+
+    def enqueue_all(self, max_queued=None):
+        """
+        Request a full run.
+
+        Starts one if none is running; otherwise sets the "rerun needed" flag,
+        i.e. a single queued follow-up run that all later triggers share.
+        Returns (job_id, created, running).
+        """
+        return self._enqueue(ALL_KEY, ALL_KEY, None, None, ('queued',), max_queued)
+
+    def _enqueue(self, dedup_key, content_key, page_id, url, dedup_statuses, max_queued):
+        """Insert a job unless one with dedup_key is in dedup_statuses"""
+        now = time.time()
+        placeholders = ",".join("?" * len(dedup_statuses))
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            running = conn.execute(
+                "SELECT 1 FROM jobs WHERE dedup_key = ? AND status = 'running' LIMIT 1",
+                (dedup_key,),
+            ).fetchone() is not None
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE dedup_key = ? AND status IN ({placeholders}) "
+                "ORDER BY id LIMIT 1",
+                (dedup_key, *dedup_statuses),
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return row['id'], False, running
+
+            if max_queued is not None:
+                queued = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+                ).fetchone()[0]
+                if queued >= max_queued:
+                    raise QueueFull(f"{queued} jobs already queued")
+
+            cursor = conn.execute(
+                "INSERT INTO jobs (dedup_key, content_key, page_id, url, status, "
+                "created_at, available_at) VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (dedup_key, content_key, page_id, url, now, now),
+            )
+            conn.execute("COMMIT")
+            return cursor.lastrowid, True, running
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self):
+        """
+        Take the oldest available job (or one whose lease expired), or None.
+
+        Queued jobs for content another job is processing are skipped.
+        """
+        now = time.time()
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE "
+                "(status = 'queued' AND available_at <= ? AND (content_key IS NULL "
+                " OR content_key NOT IN (SELECT content_key FROM jobs WHERE status = 'running' "
+                " AND lease_until >= ? AND content_key IS NOT NULL))) "
+                "OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (now, now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                "started_at = ?, lease_until = ? WHERE id = ?",
+                (now, now + LEASE_SECONDS, row['id']),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+
+    def complete(self, job_id, success, error=None):
+        """Mark a job done, or requeue it with backoff until MAX_ATTEMPTS"""
+        now = time.time()
+
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if success:
+                conn.execute(
+                    "UPDATE jobs SET status = 'done', finished_at = ?, lease_until = NULL, "
+                    "error = NULL WHERE id = ?",
+                    (now, job_id),
+                )
+            elif row and row['attempts'] < MAX_ATTEMPTS:
+                retry_at = now + RETRY_BACKOFF * 2 ** (row['attempts'] - 1)
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ?, lease_until = NULL, "
+                    "error = ? WHERE id = ?",
+                    (retry_at, error, job_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, lease_until = NULL, "
+                    "error = ? WHERE id = ?",
+                    (now, error, job_id),
+                )
+
+    def defer(self, job_id, delay, error=None):
+        """Requeue a job for later without using up an attempt (dependency down)"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', available_at = ?, lease_until = NULL, "
+                "attempts = MAX(attempts - 1, 0), error = ? WHERE id = ?",
+                (time.time() + delay, error, job_id),
+            )
+
+    def requeue_running(self):
+        """Put back jobs left 'running' by a previous server process"""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', lease_until = NULL WHERE status = 'running'"
+            )
+            return cursor.rowcount
+
+    def get(self, job_id):
+        """Return a job as a dict, or None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def counts(self):
+        """Return {status: count}"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+In-memory aggregation of job results and stage spans for the webhook
+server's /metrics endpoint (Prometheus text format).
+
+Latency is kept as cumulative histograms per span name and for whole jobs;
+numeric span attributes (input chars, audio bytes...) are summed as
+throughput counters.
+"""
+
+import threading
+
+# Histogram bucket bounds in seconds (LLM and TTS calls take minutes)
+LATENCY_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+class Histogram:
+    """Cumulative latency histogram"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+def _format_bound(bound):
+    return str(int(bound)) if float(bound).is_integer() else str(bound)
+
+class Metrics:
+    """Thread-safe registry of pipeline metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.job_latency = Histogram()
+        self.jobs = {}            # status -> count
+        self.span_latency = {}    # span name -> Histogram
+        self.span_errors = {}     # span name -> count
+        self.span_attrs = {}      # (span name, attr) -> sum
+
+    def observe_job(self, success, duration, spans=()):
+        """Record a finished job and the spans it sent back"""
+        with self._lock:
+            status = "success" if success else "failure"
+            self.jobs[status] = self.jobs.get(status, 0) + 1
+            self.job_latency.observe(duration)
+            for span in spans:
+                self._observe_span(span)
+
+    def _observe_span(self, span):
+        name = span.get("name", "unknown")
+        self.span_latency.setdefault(name, Histogram()).observe(span.get("duration", 0))
+        if span.get("status") != "ok":
+            self.span_errors[name] = self.span_errors.get(name, 0) + 1
+        for attr, value in span.get("attrs", {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                    and attr not in ("chunk", "http_status"):
+                key = (name, attr)
+                self.span_attrs[key] = self.span_attrs.get(key, 0) + value
+
+    def render(self, extra=()):
+        """
+        Prometheus text exposition of every metric.
+
+        extra: (metric, type, help, [(labels, value)...]) sampled by the caller,
+        such as queue depth.
+        """
+        lines = []
+
+        def histogram(metric, help_text, series):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, hist in series:
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f"{metric}_bucket{_labels(**labels, le=_format_bound(bound))} {count}")
+                lines.append(f"{metric}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+                suffix = _labels(**labels) if labels else ""
+                lines.append(f"{metric}_sum{suffix} {hist.sum:.4f}")
+                lines.append(f"{metric}_count{suffix} {hist.count}")
+
+        def counter(metric, help_text, series, kind="counter"):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in series:
+                suffix = _labels(**labels) if labels else ""
+                lines.append(f"{metric}{suffix} {value}")
+
+        with self._lock:
+            counter("pipeline_jobs_total", "Finished jobs by outcome",
+                    [({"status": status}, n) for status, n in sorted(self.jobs.items())])
+            histogram("pipeline_job_duration_seconds", "End-to-end job duration",
+                      [({}, self.job_latency)])
+            histogram("pipeline_span_duration_seconds", "Duration of pipeline spans by stage",
+                      [({"span": name}, hist) for name, hist in sorted(self.span_latency.items())])
+            counter("pipeline_span_errors_total", "Failed spans by stage",
+                    [({"span": name}, n) for name, n in sorted(self.span_errors.items())])
+            counter("pipeline_span_size_total",
+                    "Sum of span size attributes (chars, bytes, chunks) by stage",
+                    [({"span": name, "attr": attr}, value)
+                     for (name, attr), value in sorted(self.span_attrs.items())])
+
+        for metric, kind, help_text, series in extra:
+            counter(metric, help_text, series, kind=kind)
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection of extracted content (MinHash + LSH).
+
+The same syndicated article on several sites, or the same talk uploaded by
+several channels, has different URLs (so different content keys) but almost
+the same text. Each summarized document gets a MinHash signature of its
+word 3-shingles; the signature is split into LSH bands stored in an indexed
+SQLite table, so a lookup is a handful of B-tree probes followed by a
+signature comparison with the few candidates, whatever the index size.
+
+A document whose estimated Jaccard similarity with an indexed one reaches
+NEAR_DUPLICATE_THRESHOLD reuses that document's summary and audio.
+"""
+
+import os
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs", "near_duplicates.db")
+
+NEAR_DUPLICATES = os.getenv("NEAR_DUPLICATES", "1") == "1"
+
+# Estimated Jaccard similarity of word 3-shingles above which content is reused
+# (one word in 20 changed scores about 0.75, one in 50 about 0.9)
+THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS = 32                # 32 bands x 4 rows: a 0.7-similar document is a candidate 99.9% of the time
+ROWS = NUM_PERM // BANDS
+
+# Documents with fewer shingles aren't indexed (too short to compare reliably)
+MIN_SHINGLES = 50
+
+# Universal hashing (a * x + b) mod PRIME over 32-bit shingle hashes; fixed
+# seed so signatures stay comparable across runs
+PRIME = 4294967291
+_SEED = 1
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, doc_id)
+) WITHOUT ROWID;
+"""
+
+_permutations = None
+
+def _coefficients():
+    global _permutations
+    if _permutations is None:
+        import numpy as np
+        rng = np.random.RandomState(_SEED)
+        a = rng.randint(1, PRIME, size=NUM_PERM, dtype=np.uint64)
+        b = rng.randint(0, PRIME, size=NUM_PERM, dtype=np.uint64)
+        _permutations = (a.reshape(-1, 1), b.reshape(-1, 1))
+    return _permutations
+
+def shingles(text):
+    """32-bit hashes of the distinct word 3-shingles of a text"""
+    words = [w.lower() for w in WORD.findall(text)]
+    return {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode('utf-8'))
+        for i in range(max(len(words) - SHINGLE_WORDS + 1, 0))
+    }
+
+def signature(text):
+    """MinHash signature (NUM_PERM uint32) of a text, or None if too short"""
+    import numpy as np
+
+    hashes = shingles(text)
+    if len(hashes) < MIN_SHINGLES:
+        return None
+
+    a, b = _coefficients()
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    result = np.full(NUM_PERM, PRIME, dtype=np.uint64)
+    # a * x < 2^64 for 32-bit a and x; blocks bound the temporary matrix
+    for start in range(0, len(values), 8192):
+        block = (a * values[start:start + 8192] + b) % PRIME
+        np.minimum(result, block.min(axis=1), out=result)
+    return result.astype(np.uint32)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float((sig_a == sig_b).mean())
+
+def _buckets(sig):
+    """One signed 32-bit bucket ID per band (collisions are weeded out by similarity)"""
+    return [
+        int.from_bytes(hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(),
+                                       digest_size=4).digest(), 'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+class NearDuplicateIndex:
+    """SQLite-backed MinHash LSH index of summarized documents"""
+
+    def __init__(self, path=None):
+        self.path = path or DB_PATH
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # One connection per thread: opening one costs more than a lookup
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30,
+                                                      isolation_level=None)
+        return conn
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def add(self, key, sig):
+        """Index (or re-index) the signature of a content key"""
+        if sig is None:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT id FROM documents WHERE key = ?", (key,)).fetchone()
+            if row:
+                doc_id = row[0]
+                self._delete_bands(conn, doc_id)
+                conn.execute("UPDATE documents SET signature = ?, created_at = ? WHERE id = ?",
+                             (sig.tobytes(), time.time(), doc_id))
+            else:
+                doc_id = conn.execute(
+                    "INSERT INTO documents (key, signature, created_at) VALUES (?, ?, ?)",
+                    (key, sig.tobytes(), time.time()),
+                ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO bands (band, bucket, doc_id) VALUES (?, ?, ?)",
+                [(band, bucket, doc_id) for band, bucket in enumerate(_buckets(sig))],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def query(self, sig, threshold=THRESHOLD, exclude_key=None):
+        """[(key, similarity)] of indexed documents at or above threshold, best first"""
+        import numpy as np
+
+        if sig is None:
+            return []
+        buckets = _buckets(sig)
+        conditions = " OR ".join(["(band = ? AND bucket = ?)"] * BANDS)
+        params = [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+
+        rows = self._connect().execute(
+            "SELECT key, signature FROM documents WHERE id IN "
+            f"(SELECT doc_id FROM bands WHERE {conditions})",
+            params,
+        ).fetchall()
+
+        matches = []
+        for key, blob in rows:
+            if key == exclude_key:
+                continue
+            score = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+            if score >= threshold:
+                matches.append((key, score))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def remove(self, key):
+        """Forget a content key"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT id FROM documents WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._delete_bands(conn, row[0])
+            conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+        conn.execute("COMMIT")
+
+    def _delete_bands(self, conn, doc_id):
+        # Bands are keyed (band, bucket, doc_id): recompute the buckets rather
+        # than scanning the table for doc_id
+        import numpy as np
+
+        blob = conn.execute("SELECT signature FROM documents WHERE id = ?",
+                            (doc_id,)).fetchone()[0]
+        buckets = _buckets(np.frombuffer(blob, dtype=np.uint32))
+        conn.executemany("DELETE FROM bands WHERE band = ? AND bucket = ? AND doc_id = ?",
+                         [(band, bucket, doc_id) for band, bucket in enumerate(buckets)])
@@ -1,11 +1,15 @@
 import os
 import requests
 from dotenv import load_dotenv
+from url_canon import canonical_key
+from tracing import span
+import circuit_breaker
 
 load_dotenv()
 
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
+NOTION_API_URL = os.getenv("NOTION_API_URL", "https://api.notion.com/v1")
 
 headers = {
     "Authorization": f"Bearer {NOTION_TOKEN}",
@@ -13,6 +17,22 @@ headers = {
     "Notion-Version": "2022-06-28"
 }
 
+def notion_request(method, url, call, page_id=None, **kwargs):
+    """
+    Send a Notion API request and return the response.
+
+    The request is timed as a "notion" span (call names it) and goes through
+    the notion circuit breaker: outage statuses count as failures, and
+    CircuitOpen is raised without calling Notion while the breaker is open.
+    """
+    attrs = {'call': call} if page_id is None else {'call': call, 'page_id': page_id}
+    with span("notion", **attrs) as attrs, circuit_breaker.guard("notion") as guard:
+        response = requests.request(method, url, headers=headers, **kwargs)
+        attrs['http_status'] = response.status_code
+        if circuit_breaker.http_outage(response.status_code):
+            guard.fail(f"HTTP {response.status_code}")
+    return response
+
 def detect_type_from_url(url):
     """Détecte le type de contenu à partir de l'URL"""
     url = url.lower()
@@ -26,9 +46,13 @@ def detect_type_from_url(url):
 
 def get_database_entries():
     """Récupère les entrées de la base de données Notion"""
-    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
+    url = f"{NOTION_API_URL}/databases/{NOTION_DATABASE_ID}/query"
 
-    response = requests.post(url, headers=headers)
+    try:
+        response = notion_request("POST", url, "query_database")
+    except circuit_breaker.CircuitOpen as e:
+        print(f"Erreur: {e}")
+        return []
 
     if response.status_code != 200:
         print(f"Erreur: {response.status_code}")
@@ -75,12 +99,23 @@ def analyze_entries(entries):
         files = summary_prop.get("files", [])
         has_summary = len(files) > 0
 
+        # Priorité optionnelle (number, ou select High/Low) pour l'ordonnancement
+        priority_prop = props.get("Priority", {})
+        if priority_prop.get("type") == "number":
+            priority = priority_prop.get("number") or 0
+        else:
+            priority_select = priority_prop.get("select") or {}
+            priority = {"high": 1, "low": -1}.get((priority_select.get("name") or "").lower(), 0)
+
         entry_info = {
             "id": entry.get("id"),
             "name": name,
             "url": url,
+            "canonical_key": canonical_key(url),
             "type": content_type,
-            "has_summary": has_summary
+            "has_summary": has_summary,
+            "priority": priority,
+            "created_time": entry.get("created_time")
         }
 
         if has_summary:
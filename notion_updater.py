@@ -1,20 +1,9 @@
 import os
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-
-NOTION_TOKEN = os.getenv("NOTION_TOKEN")
-
-headers = {
-    "Authorization": f"Bearer {NOTION_TOKEN}",
-    "Content-Type": "application/json",
-    "Notion-Version": "2022-06-28"
-}
+from notion_reader import NOTION_API_URL, notion_request
 
 def update_text_summary(page_id, file_url, filename):
     """Update the 'Text summary' field in Notion with the Drive link"""
-    url = f"https://api.notion.com/v1/pages/{page_id}"
+    url = f"{NOTION_API_URL}/pages/{page_id}"
 
     # Notion limits filename to 100 chars
     if len(filename) > 100:
@@ -38,7 +27,7 @@ def update_text_summary(page_id, file_url, filename):
         }
     }
 
-    response = requests.patch(url, headers=headers, json=data)
+    response = notion_request("PATCH", url, "text_summary", page_id=page_id, json=data)
 
     if response.status_code == 200:
         print(f"Notion updated: {filename}")
@@ -50,7 +39,7 @@ def update_text_summary(page_id, file_url, filename):
 
 def update_audio_summary(page_id, file_url, filename):
     """Update the 'Audio summary' field in Notion with the Drive link"""
-    url = f"https://api.notion.com/v1/pages/{page_id}"
+    url = f"{NOTION_API_URL}/pages/{page_id}"
 
     # Notion limits filename to 100 chars
     if len(filename) > 100:
@@ -74,7 +63,7 @@ def update_audio_summary(page_id, file_url, filename):
         }
     }
 
-    response = requests.patch(url, headers=headers, json=data)
+    response = notion_request("PATCH", url, "audio_summary", page_id=page_id, json=data)
 
     if response.status_code == 200:
         print(f"Notion audio updated: {filename}")
@@ -87,7 +76,7 @@ def update_audio_summary(page_id, file_url, filename):
 
 def update_page_title(page_id, title):
     """Update the 'Link' title field in Notion with the content title"""
-    url = f"https://api.notion.com/v1/pages/{page_id}"
+    url = f"{NOTION_API_URL}/pages/{page_id}"
 
     data = {
         "properties": {
@@ -104,7 +93,7 @@ def update_page_title(page_id, title):
         }
     }
 
-    response = requests.patch(url, headers=headers, json=data)
+    response = notion_request("PATCH", url, "page_title", page_id=page_id, json=data)
 
     if response.status_code == 200:
         print(f"Notion title updated: {title}")
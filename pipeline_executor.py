@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Staged pipeline executor.
+
+Each stage has its own worker pool and a bounded input queue, so different
+entries can be in different stages at the same time (entry N+1 extracts
+while entry N summarizes and entry N-1 uploads). A full queue blocks the
+stage before it, which is what provides backpressure.
+
+With a priority function, every stage queue hands out the waiting job with
+the lowest priority(job) first, so a schedule decided up front survives
+stages that finish jobs out of order.
+"""
+
+import time
+import queue
+import itertools
+import threading
+
+_STOP = object()
+
+class Stage:
+    """A pipeline stage: func(job) -> job, or None to drop the job"""
+
+    def __init__(self, name, func, workers=1, queue_size=None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size or workers * 2)
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._finished_workers = 0
+
+class StagedExecutor:
+    """Run jobs through a list of stages with per-stage worker pools"""
+
+    def __init__(self, stages, priority=None):
+        self.stages = stages
+        self.priority = priority
+        if priority is not None:
+            for stage in stages:
+                stage.queue = queue.PriorityQueue(maxsize=stage.queue.maxsize)
+        self._sequence = itertools.count()
+        self.completed = []
+        self.failed = []
+        self._results_lock = threading.Lock()
+        self._threads = []
+        self._started_at = None
+        self._finished_at = None
+
+    def start(self):
+        self._started_at = time.time()
+        for index, stage in enumerate(self.stages):
+            for i in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(index,),
+                    name=f"{stage.name}-{i + 1}", daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, job):
+        """Queue a job for the first stage (blocks while the stage is full)"""
+        self._put(self.stages[0], job)
+
+    def close(self):
+        """Signal that no more jobs will be submitted"""
+        for _ in range(self.stages[0].workers):
+            self._put(self.stages[0], _STOP)
+
+    def _put(self, stage, job):
+        if self.priority is None:
+            stage.queue.put(job)
+            return
+        # Stops sort after every job; the sequence keeps equal priorities FIFO
+        key = (1,) if job is _STOP else (0, self.priority(job))
+        stage.queue.put((key, next(self._sequence), job))
+
+    def _get(self, stage):
+        item = stage.queue.get()
+        return item if self.priority is None else item[2]
+
+    def wait(self):
+        for thread in self._threads:
+            thread.join()
+        self._finished_at = time.time()
+        return self.completed, self.failed
+
+    def run(self, jobs):
+        """Submit every job, wait for all of them and return (completed, failed)"""
+        self.start()
+        for job in jobs:
+            self.submit(job)
+        self.close()
+        return self.wait()
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            job = self._get(stage)
+            if job is _STOP:
+                break
+
+            started = time.time()
+            try:
+                result = stage.func(job)
+            except Exception as e:
+                print(f"\n✗ ERROR [{stage.name}]: {e}")
+                result = None
+                with stage._lock:
+                    stage.failed += 1
+            elapsed = time.time() - started
+
+            with stage._lock:
+                stage.processed += 1
+                stage.busy_seconds += elapsed
+
+            if result is None:
+                with self._results_lock:
+                    self.failed.append(job)
+            elif next_stage:
+                self._put(next_stage, result)
+            else:
+                with self._results_lock:
+                    self.completed.append(result)
+
+        # The last worker of a stage to exit stops the next stage
+        with stage._lock:
+            stage._finished_workers += 1
+            last = stage._finished_workers == stage.workers
+        if last and next_stage:
+            for _ in range(next_stage.workers):
+                self._put(next_stage, _STOP)
+
+    def report(self):
+        """Print throughput and per-stage utilization"""
+        wall = (self._finished_at or time.time()) - self._started_at
+        total = len(self.completed) + len(self.failed)
+        per_minute = len(self.completed) / wall * 60 if wall > 0 else 0
+
+        print(f"\nPipeline: {total} entries in {wall:.1f}s "
+              f"({per_minute:.2f} completed/min)")
+        print(f"  {'Stage':<12} {'Workers':>7} {'Done':>5} {'Failed':>6} "
+              f"{'Busy (s)':>9} {'Util':>6}")
+        for stage in self.stages:
+            capacity = stage.workers * wall
+            utilization = stage.busy_seconds / capacity if capacity > 0 else 0
+            print(f"  {stage.name:<12} {stage.workers:>7} {stage.processed:>5} "
+                  f"{stage.failed:>6} {stage.busy_seconds:>9.1f} {utilization:>6.0%}")
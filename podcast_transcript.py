@@ -1,6 +1,26 @@
 import os
-import yt_dlp
-from faster_whisper import WhisperModel
+import re
+import json
+import hashlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import requests
+from requests.adapters import HTTPAdapter
+import artifact_store
+
+# Parallel ranged download settings for RSS enclosures
+DOWNLOAD_PARTS = 8
+MIN_PART_SIZE = 1024 * 1024  # don't split below 1 MB per part
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.aac', '.ogg', '.opus', '.wav')
+
+_session = None
+
+# Loaded Whisper models, kept for the life of the process
+_models = {}
 
 def sanitize_filename(title):
     """Remove invalid characters from filename"""
@@ -11,6 +31,8 @@ def sanitize_filename(title):
 
 def get_podcast_info(url):
     """Get podcast title and metadata using yt-dlp"""
+    import yt_dlp
+
     ydl_opts = {
         'quiet': True,
         'no_warnings': True,
@@ -25,8 +47,212 @@ def get_podcast_info(url):
             'duration': info.get('duration', 0),
         }
 
+def get_session():
+    """Shared HTTP session, pooled so parallel range requests reuse connections"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_PARTS)
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+def _normalize_title(title):
+    return re.sub(r'\W+', ' ', title or '').strip().lower()
+
+def _feed_enclosures(feed_url):
+    """Parse an RSS feed and return [(title, guid, enclosure_url)] in feed order"""
+    response = get_session().get(feed_url, timeout=DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    root = ET.fromstring(response.content)
+
+    items = []
+    for item in root.iter('item'):
+        enclosure = item.find('enclosure')
+        if enclosure is None or not enclosure.get('url'):
+            continue
+        items.append((
+            item.findtext('title', default=''),
+            item.findtext('guid', default=''),
+            enclosure.get('url'),
+        ))
+    return items
+
+def _match_enclosure(items, title):
+    """Pick the feed item matching the episode title, else None"""
+    wanted = _normalize_title(title)
+    if not wanted:
+        return None
+    for item_title, _, enclosure_url in items:
+        if _normalize_title(item_title) == wanted:
+            return enclosure_url
+    for item_title, _, enclosure_url in items:
+        normalized = _normalize_title(item_title)
+        if normalized and (wanted in normalized or normalized in wanted):
+            return enclosure_url
+    return None
+
+def _resolve_apple_enclosure(url, title=None):
+    """Resolve an Apple Podcasts episode URL via the iTunes lookup API + RSS feed"""
+    parsed = urlparse(url)
+    podcast_id = re.search(r'/id(\d+)', parsed.path)
+    if not podcast_id:
+        return None
+    episode_id = parse_qs(parsed.query).get('i', [None])[0]
+    country = parsed.path.strip('/').split('/')[0] or 'us'
+
+    response = get_session().get(
+        "https://itunes.apple.com/lookup",
+        params={
+            'id': podcast_id.group(1),
+            'entity': 'podcastEpisode',
+            'country': country,
+            'limit': 200,
+        },
+        timeout=DOWNLOAD_TIMEOUT,
+    )
+    response.raise_for_status()
+    results = response.json().get('results', [])
+
+    feed_url = None
+    for result in results:
+        if result.get('kind') == 'podcast-episode':
+            if episode_id and str(result.get('trackId')) == episode_id and result.get('episodeUrl'):
+                return result['episodeUrl']
+            if not title and str(result.get('trackId')) == episode_id:
+                title = result.get('trackName')
+        elif result.get('feedUrl'):
+            feed_url = result['feedUrl']
+
+    # Older episodes are not in the lookup response: fall back to the feed itself
+    if feed_url and title:
+        return _match_enclosure(_feed_enclosures(feed_url), title)
+    return None
+
+def resolve_enclosure_url(url, title=None):
+    """
+    Find the direct audio file (RSS enclosure) behind a podcast URL.
+    Returns None when the URL can't be resolved (yt-dlp is used instead).
+    """
+    path = urlparse(url).path.lower()
+    if path.endswith(AUDIO_EXTENSIONS):
+        return url
+
+    try:
+        if 'podcasts.apple.com' in url:
+            return _resolve_apple_enclosure(url, title)
+
+        # Plain RSS feed: match the episode title, else take the latest item
+        response = get_session().head(url, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+        content_type = response.headers.get('Content-Type', '')
+        if 'xml' in content_type or 'rss' in content_type:
+            items = _feed_enclosures(url)
+            if items:
+                return _match_enclosure(items, title) or items[0][2]
+    except (requests.RequestException, ET.ParseError) as e:
+        print(f"Could not resolve RSS enclosure: {e}")
+
+    return None
+
+def _download_range(url, path, start, end):
+    """Download bytes [start, end] into the preallocated file, return bytes written"""
+    headers = {'Range': f"bytes={start}-{end}"}
+    written = 0
+    with get_session().get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code != 206:
+            raise Exception(f"Range request refused ({response.status_code})")
+        with open(path, 'r+b') as f:
+            f.seek(start)
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+
+    if written != end - start + 1:
+        raise Exception(f"Incomplete range {start}-{end}: got {written} bytes")
+    return written
+
+def _download_stream(url, path):
+    """Download the whole file in a single request"""
+    with get_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        expected = response.headers.get('Content-Length')
+        written = 0
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+
+    if expected is not None and written != int(expected):
+        raise Exception(f"Incomplete download: got {written} of {expected} bytes")
+    return written
+
+def _probe_size(url):
+    """Return the total size if the server honours Range requests, else None"""
+    with get_session().get(url, headers={'Range': 'bytes=0-0'}, stream=True,
+                           timeout=DOWNLOAD_TIMEOUT) as response:
+        content_range = response.headers.get('Content-Range', '')
+        if response.status_code != 206 or '/' not in content_range:
+            return None
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+
+def download_enclosure(url, output_dir="temp", parts=DOWNLOAD_PARTS):
+    """
+    Download a podcast enclosure with parallel HTTP Range requests.
+
+    The file is preallocated and each part is written at its offset. Falls back
+    to a single stream when the server doesn't support ranges.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if ext not in AUDIO_EXTENSIONS:
+        ext = '.mp3'
+    name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    audio_path = os.path.join(output_dir, f"{name}{ext}")
+    part_path = audio_path + '.part'
+
+    # Kept from an interrupted run (only renamed once complete)
+    if os.path.exists(audio_path):
+        print(f"Reusing downloaded audio: {audio_path}")
+        return audio_path
+
+    total = _probe_size(url)
+    parts = min(parts, total // MIN_PART_SIZE) if total else 0
+
+    try:
+        if parts > 1:
+            try:
+                with open(part_path, 'wb') as f:
+                    f.truncate(total)
+
+                part_size = -(-total // parts)
+                ranges = [(start, min(start + part_size, total) - 1)
+                          for start in range(0, total, part_size)]
+                with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+                    written = sum(pool.map(lambda r: _download_range(url, part_path, *r), ranges))
+
+                if written != total or os.path.getsize(part_path) != total:
+                    raise Exception(f"Size mismatch: got {written} of {total} bytes")
+                print(f"Downloaded {total / (1024 * 1024):.1f} MB in {len(ranges)} parallel parts")
+            except Exception as e:
+                print(f"Ranged download failed ({e}), retrying as a single stream...")
+                _download_stream(url, part_path)
+        else:
+            _download_stream(url, part_path)
+    except BaseException:
+        # A partial file is never resumed: don't leave it behind
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    os.replace(part_path, audio_path)
+    return audio_path
+
 def download_audio(url, output_dir="temp"):
     """Download audio from podcast URL using yt-dlp"""
+    import yt_dlp
+
     os.makedirs(output_dir, exist_ok=True)
 
     ydl_opts = {
@@ -41,26 +267,106 @@ def download_audio(url, output_dir="temp"):
     }
 
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(url, download=True)
+        info = ydl.extract_info(url, download=False)
         audio_path = os.path.join(output_dir, f"{info['id']}.mp3")
+
+        # Kept from an interrupted run
+        if os.path.exists(audio_path):
+            print(f"Reusing downloaded audio: {audio_path}")
+        else:
+            ydl.process_ie_result(info, download=True)
+
         return audio_path, info.get('title', 'Untitled')
 
-def transcribe_audio(audio_path, model_size="base"):
-    """Transcribe audio using Whisper"""
-    print(f"Loading Whisper model ({model_size})...")
-    model = WhisperModel(model_size, device="cpu", compute_type="int8")
+def get_whisper_model(model_size="base"):
+    """Load a Whisper model once per process"""
+    if model_size not in _models:
+        from faster_whisper import WhisperModel
+        print(f"Loading Whisper model ({model_size})...")
+        _models[model_size] = WhisperModel(model_size, device="cpu", compute_type="int8")
+    return _models[model_size]
+
+def load_checkpoint(checkpoint_path):
+    """Read finished segments from a sidecar file, return (language, segments)"""
+    language = None
+    segments = []
+    if not os.path.exists(checkpoint_path):
+        return language, segments
 
-    print("Transcribing audio (this may take a while)...")
-    segments, info = model.transcribe(audio_path, beam_size=5)
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Last line may be cut off if the process died mid-write
+                continue
+            if 'language' in record:
+                language = record['language']
+            else:
+                segments.append(record)
 
-    print(f"Detected language: {info.language} (probability: {info.language_probability:.2f})")
+    return language, segments
 
-    # Combine all segments
-    transcript_text = ""
-    for segment in segments:
-        transcript_text += segment.text + " "
+def _drop_partial_line(checkpoint_path):
+    """Cut the sidecar back to its last complete line, so appends start on a fresh one"""
+    if not os.path.exists(checkpoint_path):
+        return
+    with open(checkpoint_path, 'r+b') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end != len(data):
+            f.truncate(end)
 
-    return transcript_text.strip(), info.language
+def transcribe_audio(audio_path, model_size="base", checkpoint_path=None):
+    """
+    Transcribe audio using Whisper.
+
+    Finished segments are appended to a sidecar .segments.jsonl file as they
+    are produced, so an interrupted run resumes from the last completed timestamp.
+    """
+    if checkpoint_path is None:
+        checkpoint_path = audio_path + '.segments.jsonl'
+
+    language, done_segments = load_checkpoint(checkpoint_path)
+    resume_from = done_segments[-1]['end'] if done_segments else 0
+
+    model = get_whisper_model(model_size)
+
+    if resume_from:
+        print(f"Resuming transcription at {resume_from:.1f}s ({len(done_segments)} segments done)...")
+    else:
+        print("Transcribing audio (this may take a while)...")
+    segments, info = model.transcribe(
+        audio_path,
+        beam_size=5,
+        language=language,
+        clip_timestamps=[resume_from],
+    )
+
+    if language is None:
+        language = info.language
+        print(f"Detected language: {info.language} (probability: {info.language_probability:.2f})")
+
+    transcript_parts = [segment['text'] for segment in done_segments]
+
+    # A line cut off by a crash would swallow the next record
+    _drop_partial_line(checkpoint_path)
+    with open(checkpoint_path, 'a', encoding='utf-8') as f:
+        if not done_segments:
+            f.write(json.dumps({'language': language}) + '\n')
+
+        for segment in segments:
+            f.write(json.dumps({
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text,
+            }, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+            transcript_parts.append(segment.text)
+
+    transcript_text = " ".join(text.strip() for text in transcript_parts)
+    return transcript_text.strip(), language
 
 def transcript_to_markdown(transcript_text, url, title):
     """Convert transcript to markdown"""
@@ -84,19 +390,22 @@ def transcript_to_markdown(transcript_text, url, title):
 
     return '\n'.join(lines)
 
-def save_podcast_transcript(url, output_dir="output", model_size="base"):
-    """Download, transcribe and save podcast as .md"""
-    os.makedirs(output_dir, exist_ok=True)
-
+def save_podcast_transcript(url, output_dir=None, model_size="base"):
+    """Download, transcribe and save podcast as .md (in the artifact store)"""
     # Get podcast info
     print("Fetching podcast info...")
     podcast_info = get_podcast_info(url)
     title = podcast_info['title']
     print(f"Title: {title}")
 
-    # Download audio
+    # Download audio: direct RSS enclosure when possible, else yt-dlp
     print("Downloading audio...")
-    audio_path, _ = download_audio(url)
+    enclosure_url = resolve_enclosure_url(url, title)
+    if enclosure_url:
+        print(f"RSS enclosure: {enclosure_url}")
+        audio_path = download_enclosure(enclosure_url)
+    else:
+        audio_path, _ = download_audio(url)
     print(f"Audio downloaded: {audio_path}")
 
     # Transcribe
@@ -108,14 +417,12 @@ def save_podcast_transcript(url, output_dir="output", model_size="base"):
     # Save
     safe_title = sanitize_filename(title)
     filename = f"{safe_title}_transcript.md"
-    filepath = os.path.join(output_dir, filename)
-
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(markdown)
+    filepath = artifact_store.put_text(markdown, filename, kind="transcript", root=output_dir)
 
-    # Cleanup temp audio
-    if os.path.exists(audio_path):
-        os.remove(audio_path)
+    # Cleanup temp audio and checkpoint, only now that the transcript is complete
+    for path in (audio_path, audio_path + '.segments.jsonl'):
+        if os.path.exists(path):
+            os.remove(path)
 
     print(f"Transcript saved: {filepath} (language: {language})")
     return filepath, title
@@ -128,7 +435,6 @@ if __name__ == "__main__":
     try:
         filepath, title = save_podcast_transcript(test_url, model_size="base")
         print(f"\nContent (first 500 chars):")
-        with open(filepath, 'r') as f:
-            print(f.read()[:500])
+        print(artifact_store.read_text(filepath)[:500])
     except Exception as e:
         print(f"Error: {e}")
@@ -1,17 +1,279 @@
 import os
+import sys
+import time
+import threading
 from notion_reader import get_database_entries, analyze_entries
 from youtube_transcript import save_transcript as save_youtube_transcript
 from article_extractor import save_article
+from article_fetcher import prefetch_articles
 from summarizer import summarize_file
 from audio_generator import generate_audio_from_summary
 from drive_uploader import upload_to_drive
 from notion_updater import update_text_summary, update_audio_summary, update_page_title
+from pipeline_executor import Stage, StagedExecutor
+from job_manifest import (
+    load_manifest, completed_stage, uploaded_stage, record_stage,
+    page_done, record_page_done, reset_pages,
+)
+from url_canon import canonical_key
+from scheduler import order_entries
+import near_duplicates
+import circuit_breaker
+import artifact_store
+import tracing
 
-def process_entry(entry):
-    """Process a single entry: extract content, summarize, upload, update Notion"""
+# Worker pool size per stage for batch runs
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "8"))
+SUMMARIZE_WORKERS = int(os.getenv("SUMMARIZE_WORKERS", "2"))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2"))
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+NOTION_WORKERS = int(os.getenv("NOTION_WORKERS", "2"))
+
+def extract_stage(job):
+    """Step 1: Extract content (returns None to skip the entry)"""
+    entry = job['entry']
+    content_type = entry['type']
+    url = entry['url']
+
+    if content_type == "Podcast":
+        print("  SKIP: Podcasts not supported yet")
+        return None
+    if not job.get('prefetched') and content_type not in ("Youtube video", "Article"):
+        print(f"  SKIP: Unknown type {content_type}")
+        return None
+
+    with tracing.span("extract", type=content_type,
+                      prefetched=bool(job.get('prefetched'))) as attrs:
+        if job.get('prefetched'):
+            job['filepath'], job['title'] = job['prefetched']
+        elif content_type == "Youtube video":
+            job['filepath'], job['title'] = save_youtube_transcript(url)
+        else:
+            job['filepath'], job['title'] = save_article(url)
+        attrs['output_bytes'] = os.path.getsize(job['filepath'])
+    return job
+
+_near_duplicate_index = None
+_near_duplicate_lock = threading.Lock()
+
+def near_duplicate_index():
+    """Shared NearDuplicateIndex, opened on first use"""
+    global _near_duplicate_index
+    with _near_duplicate_lock:
+        if _near_duplicate_index is None:
+            _near_duplicate_index = near_duplicates.NearDuplicateIndex()
+        return _near_duplicate_index
+
+def find_near_duplicate(job):
+    """
+    Look the extracted content up in the near-duplicate index.
+
+    Sets job['signature'], and job['duplicate_of'] to the manifest of a
+    near-identical content whose summary and audio are still on disk (None
+    if there is none); matches whose files are gone leave the index. Content
+    is indexed once its audio exists, so a match never races the original's
+    TTS for the same file.
+    """
+    job['signature'] = job['duplicate_of'] = None
+    if not near_duplicates.NEAR_DUPLICATES:
+        return None
+
+    _, _, body = artifact_store.read_text(job['filepath']).partition('\n---\n')
+
+    key = job['manifest']['key']
+    with tracing.span("near_duplicate") as attrs:
+        job['signature'] = near_duplicates.signature(body)
+        matches = near_duplicate_index().query(job['signature'], exclude_key=key)
+        attrs['matches'] = len(matches)
+        for original_key, score in matches:
+            original = load_manifest(original_key, None)
+            if any(completed_stage(original, stage) is None
+                   for stage in ('summarize', 'tts')):
+                # Evicted or changed since it was indexed: re-added once its
+                # audio is generated again
+                near_duplicate_index().remove(original_key)
+                continue
+            print(f"  Near-duplicate of {original_key} ({score:.0%} similar), "
+                  f"reusing its results")
+            attrs['similarity'] = score
+            job['duplicate_of'] = original
+            break
+    return job['duplicate_of']
+
+def reused(job, stage):
+    """Outputs of a stage already done for the near-duplicate original, or None"""
+    original = job.get('duplicate_of')
+    return completed_stage(original, stage) if original else None
+
+def summarize_stage(job):
+    """Step 2: Summarize (or reuse the summary of near-identical content)"""
+    if find_near_duplicate(job):
+        job.update(reused(job, 'summarize'))
+        return job
+
+    print(f"\nGenerating summary: {job['title'][:50]}...")
+    job['summary_path'], _ = summarize_file(job['filepath'], job['entry']['type'])
+    return job
+
+def audio_stage(job):
+    """Step 3: Generate audio"""
+    done = reused(job, 'tts')
+    if done:
+        job.update(done)
+        return job
+
+    print(f"\nGenerating audio: {job['title'][:50]}...")
+    job['audio_path'] = generate_audio_from_summary(job['summary_path'])
+    if job.get('signature') is not None:
+        near_duplicate_index().add(job['manifest']['key'], job['signature'])
+    return job
+
+def upload_stage(job):
+    """Step 4: Upload to Drive (summary + audio)"""
+    done = reused(job, 'upload')
+    if done:
+        job.update(done)
+        return job
+
+    print(f"\nUploading to Drive: {job['title'][:50]}...")
+    _, job['drive_link'] = upload_to_drive(job['summary_path'])
+    _, job['audio_drive_link'] = upload_to_drive(job['audio_path'])
+    return job
+
+def notion_stage(job):
+    """
+    Step 5: Update Notion, then rename the Link column to the content title.
+
+    Every page pointing at the same content (entry['duplicates']) gets the
+    same links, even if an earlier job already updated it: the page being
+    enqueued again means its Notion fields were cleared since.
+    """
+    entry = job['entry']
+    manifest = job['manifest']
+    filename = artifact_store.display_name(job['summary_path'])
+    audio_filename = artifact_store.display_name(job['audio_path'])
+
+    for page in [entry] + entry.get('duplicates', []):
+        page_id = page['id']
+        if page_done(manifest, page_id):
+            continue
+
+        print(f"\nUpdating Notion: {job['title'][:50]}...")
+        updated = (
+            update_text_summary(page_id, job['drive_link'], filename)
+            and update_audio_summary(page_id, job['audio_drive_link'], audio_filename)
+            and update_page_title(page_id, job['title'])
+        )
+        if not updated:
+            raise Exception("Notion update failed")
+        record_page_done(manifest, page_id)
+
+    # Delivered: the files may now be evicted to stay under the disk quota.
+    # Evicted content can't be reused for near-duplicates any more.
+    artifact_store.mark_delivered([job['filepath'], job['summary_path'], job['audio_path']])
+    for key in artifact_store.enforce_quota():
+        near_duplicate_index().remove(key)
+
+    print(f"\n✓ SUCCESS: {job['title']}")
+    return job
+
+# (name, function, outputs restored on retry, outputs that are files to hash)
+# The notion stage tracks completion per page itself (outputs=None)
+STAGES = [
+    ("extract", extract_stage, ['filepath', 'title'], ['filepath']),
+    ("summarize", summarize_stage, ['summary_path'], ['summary_path']),
+    ("tts", audio_stage, ['audio_path'], ['audio_path']),
+    ("upload", upload_stage, ['drive_link', 'audio_drive_link'], []),
+    ("notion", notion_stage, None, None),
+]
+
+# Circuit breakers of the dependencies each stage delivers to (extract checks
+# YouTube itself, at call time: articles don't need it)
+STAGE_DEPENDENCIES = {
+    "extract": [],
+    "summarize": ["llm"],
+    "tts": ["tts"],
+    "upload": ["drive"],
+    "notion": ["notion"],
+}
+
+def check_breakers(name):
+    """
+    Raise CircuitOpen if a dependency of this stage or of any later one is
+    down: the job stops before doing work it couldn't deliver, and the
+    stages it already finished stay parked in its manifest for the retry.
+    """
+    names = [stage for stage, *_ in STAGES]
+    dependencies = [dependency for stage in names[names.index(name):]
+                    for dependency in STAGE_DEPENDENCIES[stage]]
+    blocked = circuit_breaker.blocked(dependencies)
+    if blocked:
+        raise circuit_breaker.CircuitOpen(*blocked)
+
+def link_artifacts(job, keys):
+    """Index a stage's artifacts under every page of the content, its URL and key"""
+    entry = job['entry']
+    for key in keys:
+        for page in [entry] + entry.get('duplicates', []):
+            artifact_store.link(job[key], page['id'], page.get('url'), job['manifest']['key'])
+
+def checkpointed(name, func, outputs, artifacts):
+    """Wrap a stage so it is skipped when the job manifest says it already finished"""
+    def run(job):
+        if 'manifest' not in job:
+            entry = job['entry']
+            key = entry.get('canonical_key') or canonical_key(entry['url'])
+            job['manifest'] = load_manifest(key, entry['url'])
+            # The pages were enqueued because Notion shows them without results
+            pages = [entry] + entry.get('duplicates', [])
+            reset_pages(job['manifest'], [page['id'] for page in pages])
+
+        # Spans started by the stage are tagged with the page and content key
+        with tracing.context(page_id=job['entry']['id'], key=job['manifest']['key']):
+            if outputs is None:
+                check_breakers(name)
+                return func(job)
+
+            done = completed_stage(job['manifest'], name)
+            if done is None:
+                # Uploaded content whose local files were evicted only needs its Drive links
+                done = uploaded_stage(job['manifest'], name)
+            if done is not None:
+                print(f"  [{name}] already done, skipping")
+                job.update(done)
+                return job
+
+            check_breakers(name)
+            started_at = time.time()
+            job = func(job)
+
+        if job is not None:
+            record_stage(job['manifest'], name, {key: job[key] for key in outputs},
+                         artifacts, started_at)
+            link_artifacts(job, artifacts)
+        return job
+
+    return run
+
+CHECKPOINTED_STAGES = [(name, checkpointed(name, func, outputs, artifacts))
+                       for name, func, outputs, artifacts in STAGES]
+
+def profiled_stages(profiler):
+    """CHECKPOINTED_STAGES with every stage function run under the profiler"""
+    return [(name, checkpointed(name, profiler.wrap(name, func), outputs, artifacts))
+            for name, func, outputs, artifacts in STAGES]
+
+def process_entry(entry, prefetched=None, stages=None, raise_parked=False):
+    """
+    Process a single entry: extract content, summarize, upload, update Notion.
+
+    prefetched: optional (filepath, title) of an already extracted article.
+    stages: optional (name, function) list replacing CHECKPOINTED_STAGES.
+    raise_parked: re-raise CircuitOpen instead of returning False, so the
+    caller can tell a parked entry from a failed one.
+    """
     content_type = entry['type']
     url = entry['url']
-    page_id = entry['id']
     name = entry['name']
 
     print(f"\n{'='*60}")
@@ -24,50 +286,51 @@ def process_entry(entry):
         print("  SKIP: No URL found")
         return False
 
+    job = {'entry': entry, 'prefetched': prefetched}
     try:
-        # Step 1: Extract content
-        if content_type == "Youtube video":
-            filepath, title = save_youtube_transcript(url)
-        elif content_type == "Article":
-            filepath, title = save_article(url)
-        elif content_type == "Podcast":
-            print("  SKIP: Podcasts not supported yet")
-            return False
-        else:
-            print(f"  SKIP: Unknown type {content_type}")
-            return False
-
-        # Step 2: Summarize
-        print("\nGenerating summary...")
-        summary_path, _ = summarize_file(filepath, content_type)
-
-        # Step 3: Generate audio
-        print("\nGenerating audio...")
-        audio_path = generate_audio_from_summary(summary_path)
-
-        # Step 4: Upload to Drive (summary + audio)
-        print("\nUploading to Drive...")
-        file_id, drive_link = upload_to_drive(summary_path)
-        audio_file_id, audio_drive_link = upload_to_drive(audio_path)
-
-        # Step 5: Update Notion
-        print("\nUpdating Notion...")
-        filename = os.path.basename(summary_path)
-        audio_filename = os.path.basename(audio_path)
-        update_text_summary(page_id, drive_link, filename)
-        update_audio_summary(page_id, audio_drive_link, audio_filename)
-
-        # Step 6: Rename the Link column to the content title
-        update_page_title(page_id, title)
-
-        print(f"\n✓ SUCCESS: {title}")
+        for _, stage in stages or CHECKPOINTED_STAGES:
+            job = stage(job)
+            if job is None:
+                return False
         return True
 
+    except circuit_breaker.CircuitOpen as e:
+        print(f"\n⏸ PARKED: {e}, finished stages are kept for the retry")
+        if raise_parked:
+            raise
+        return False
+
     except Exception as e:
         print(f"\n✗ ERROR: {e}")
         return False
 
-def main():
+def build_executor(stages=None):
+    """
+    Staged executor with a separately sized worker pool per stage.
+
+    Jobs carry their place in the schedule ('order', from order_entries), and
+    every stage takes the earliest-scheduled job waiting. The summarize queue
+    holds as many jobs as the extract workers can hand it, so the schedule
+    still applies at the LLM bottleneck whatever order extractions finish in.
+    """
+    stages = dict(stages or CHECKPOINTED_STAGES)
+    return StagedExecutor([
+        Stage("extract", stages["extract"], EXTRACT_WORKERS),
+        Stage("summarize", stages["summarize"], SUMMARIZE_WORKERS,
+              queue_size=max(EXTRACT_WORKERS, SUMMARIZE_WORKERS) * 2),
+        Stage("tts", stages["tts"], TTS_WORKERS),
+        Stage("upload", stages["upload"], UPLOAD_WORKERS),
+        Stage("notion", stages["notion"], NOTION_WORKERS),
+    ], priority=lambda job: job.get('order', 0))
+
+def main(profile=False):
+    """Process every pending entry; profile=True writes per-stage profiles"""
+    stages = profiler = None
+    if profile:
+        from profiling import StageProfiler
+        profiler = StageProfiler()
+        stages = profiled_stages(profiler)
+
     print("Fetching entries from Notion...")
     entries = get_database_entries()
     to_process, _ = analyze_entries(entries)
@@ -77,18 +340,72 @@ def main():
 
     print(f"\nFound {len(to_process)} entries to process (excluding podcasts)\n")
 
-    success = 0
-    failed = 0
+    skipped = [e for e in to_process if not e['url']]
+    for entry in skipped:
+        print(f"  SKIP: No URL found for {entry['name'][:50]}")
+    to_process = [e for e in to_process if e['url']]
 
+    # Pages pointing at the same content are processed once, as one job
+    groups = {}
     for entry in to_process:
-        if process_entry(entry):
-            success += 1
-        else:
-            failed += 1
+        groups.setdefault(entry['canonical_key'], []).append(entry)
+    to_process = []
+    for entries in groups.values():
+        primary = dict(entries[0], duplicates=entries[1:])
+        if primary['duplicates']:
+            print(f"  Coalescing {len(entries)} pages for {primary['canonical_key']}")
+        to_process.append(primary)
+
+    # Shortest (estimated) jobs first, with aging and Notion priority
+    print("Estimating processing cost...")
+    to_process = order_entries(to_process)
+    order = {id(entry): index for index, entry in enumerate(to_process)}
+
+    # Articles are downloaded concurrently and enter the pipeline as each one lands
+    articles = [e for e in to_process if e['type'] == "Article"]
+    others = [e for e in to_process if e['type'] != "Article"]
+
+    by_url = {}
+    for entry in articles:
+        by_url.setdefault(entry['url'], []).append(entry)
+
+    executor = build_executor(stages)
+    executor.start()
+
+    # Videos and the rest go straight to the extract workers
+    def feed_others():
+        for entry in others:
+            executor.submit({'entry': entry, 'order': order[id(entry)]})
+
+    feeder = threading.Thread(target=feed_others, daemon=True)
+    feeder.start()
+
+    for url, result in prefetch_articles(list(by_url)):
+        for entry in by_url.pop(url):
+            if isinstance(result, Exception):
+                # Fall back to the regular (retrying) fetch in the extract stage
+                print(f"\nPrefetch failed for {url}: {result}")
+                result = None
+            executor.submit({'entry': entry, 'prefetched': result,
+                             'order': order[id(entry)]})
+
+    # Anything the prefetcher didn't report
+    for entries in by_url.values():
+        for entry in entries:
+            executor.submit({'entry': entry, 'order': order[id(entry)]})
+
+    feeder.join()
+    executor.close()
+    completed, failed = executor.wait()
+    executor.report()
 
     print(f"\n{'='*60}")
-    print(f"DONE: {success} success, {failed} failed")
+    print(f"DONE: {len(completed)} success, {len(failed) + len(skipped)} failed")
     print(f"{'='*60}")
 
+    if profiler:
+        profiler.report()
+    return completed, failed + skipped
+
 if __name__ == "__main__":
-    main()
+    main(profile="--profile" in sys.argv[1:])
@@ -5,73 +5,52 @@ Called by the webhook server.
 """
 
 import sys
-import os
-from youtube_transcript import save_transcript as save_youtube_transcript
-from article_extractor import save_article
-from summarizer import summarize_file
-from drive_uploader import upload_to_drive
-from notion_updater import update_text_summary, update_audio_summary, update_page_title
-from audio_generator import generate_audio_from_summary
 from notion_reader import detect_type_from_url
-
-def process_single(page_id, url):
-    """Process a single URL and update Notion"""
+from process_all import process_entry, profiled_stages
+from url_canon import canonical_key
+
+def process_single(page_id, url, profile=False, raise_parked=False):
+    """
+    Process a single URL and update Notion.
+
+    Goes through the same checkpointed stages as process_all, so a retry
+    resumes at the first stage that didn't finish. profile=True writes
+    per-stage cProfile/tracemalloc reports under output/profile/.
+    raise_parked=True re-raises CircuitOpen when a breaker stops the entry.
+    """
     print(f"Processing URL: {url}")
     print(f"Page ID: {page_id}")
 
     content_type = detect_type_from_url(url)
     print(f"Detected type: {content_type}")
 
+    entry = {
+        "id": page_id,
+        "name": url,
+        "url": url,
+        "canonical_key": canonical_key(url),
+        "type": content_type,
+    }
+    if not profile:
+        return process_entry(entry, raise_parked=raise_parked)
+
+    from profiling import StageProfiler
+    profiler = StageProfiler()
     try:
-        # Step 1: Extract content
-        if content_type == "Youtube video":
-            filepath, title = save_youtube_transcript(url)
-        elif content_type == "Article":
-            filepath, title = save_article(url)
-        elif content_type == "Podcast":
-            print("Podcasts not supported yet")
-            return False
-        else:
-            print(f"Unknown type: {content_type}")
-            return False
-
-        # Step 2: Summarize with Claude Code
-        print("\nGenerating summary...")
-        summary_path, _ = summarize_file(filepath, content_type)
-
-        # Step 3: Generate audio
-        print("\nGenerating audio...")
-        audio_path = generate_audio_from_summary(summary_path)
-
-        # Step 4: Upload to Drive (summary + audio)
-        print("\nUploading to Drive...")
-        file_id, drive_link = upload_to_drive(summary_path)
-        audio_file_id, audio_drive_link = upload_to_drive(audio_path)
-
-        # Step 5: Update Notion
-        print("\nUpdating Notion...")
-        filename = os.path.basename(summary_path)
-        audio_filename = os.path.basename(audio_path)
-        update_text_summary(page_id, drive_link, filename)
-        update_audio_summary(page_id, audio_drive_link, audio_filename)
-
-        # Step 6: Rename the Link column to the content title
-        update_page_title(page_id, title)
-
-        print(f"\n✓ SUCCESS: {title}")
-        return True
-
-    except Exception as e:
-        print(f"\n✗ ERROR: {e}")
-        return False
+        return process_entry(entry, stages=profiled_stages(profiler),
+                             raise_parked=raise_parked)
+    finally:
+        profiler.report()
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python process_single.py <page_id> <url>")
+    profile = "--profile" in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != "--profile"]
+    if len(args) < 2:
+        print("Usage: python process_single.py <page_id> <url> [--profile]")
         sys.exit(1)
 
-    page_id = sys.argv[1]
-    url = sys.argv[2]
+    page_id = args[0]
+    url = args[1]
 
-    success = process_single(page_id, url)
+    success = process_single(page_id, url, profile)
     sys.exit(0 if success else 1)
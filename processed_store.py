@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Indexed store of processed Notion page IDs for the watcher.
+
+Replaces the append-only .processed_ids file: membership checks hit a
+primary-key index instead of an in-memory set, each ID carries the time it
+was processed, and records older than the retention period are expired.
+"""
+
+import os
+import time
+import sqlite3
+from contextlib import closing
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, ".processed_ids.db")
+LEGACY_FILE = os.path.join(BASE_DIR, ".processed_ids")
+
+# Entries processed longer ago than this are forgotten (Notion's own
+# "Text summary" field still keeps them from being processed again)
+RETENTION_DAYS = int(os.getenv("PROCESSED_RETENTION_DAYS", "180"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed (
+    page_id TEXT PRIMARY KEY,
+    processed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS processed_age ON processed(processed_at);
+"""
+
+class ProcessedStore:
+    """SQLite-backed set of processed page IDs with timestamps"""
+
+    def __init__(self, path=DB_PATH, legacy_file=LEGACY_FILE):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        if legacy_file and os.path.exists(legacy_file):
+            self._migrate(legacy_file)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _migrate(self, legacy_file):
+        """Import the old one-ID-per-line file once, then rename it"""
+        migrated_at = os.path.getmtime(legacy_file)
+        with open(legacy_file, "r") as f:
+            ids = {line.strip() for line in f if line.strip()}
+
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR IGNORE INTO processed (page_id, processed_at) VALUES (?, ?)",
+                ((page_id, migrated_at) for page_id in ids),
+            )
+            conn.execute("COMMIT")
+
+        os.replace(legacy_file, legacy_file + ".migrated")
+        print(f"Migrated {len(ids)} processed IDs from {os.path.basename(legacy_file)}")
+
+    def __contains__(self, page_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM processed WHERE page_id = ?", (page_id,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+    def processed_among(self, page_ids):
+        """Return the subset of page_ids already processed (one query)"""
+        page_ids = list(page_ids)
+        if not page_ids:
+            return set()
+        placeholders = ",".join("?" * len(page_ids))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT page_id FROM processed WHERE page_id IN ({placeholders})", page_ids
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def add(self, page_id):
+        """Record a page as processed now"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO processed (page_id, processed_at) VALUES (?, ?)",
+                (page_id, time.time()),
+            )
+
+    def expire(self, retention_days=RETENTION_DAYS):
+        """Delete records older than the retention period, return how many"""
+        cutoff = time.time() - retention_days * 86400
+        with closing(self._connect()) as conn:
+            cursor = conn.execute("DELETE FROM processed WHERE processed_at < ?", (cutoff,))
+            return cursor.rowcount
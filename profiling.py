@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-stage profiling (--profile on process_single / process_all).
+
+Each stage call runs under cProfile and between two tracemalloc snapshots.
+The .prof dump and the allocation sites that grew the most are written under
+output/profile/<run>/, and a summary table compares wall time with CPU time
+per stage: a stage with low CPU% is waiting on I/O (LLM, TTS, network), not
+running Python code.
+
+Nothing here is imported or wrapped unless profiling is requested.
+tracemalloc is process-wide, so with several workers per stage the
+allocation reports include concurrent stages (set *_WORKERS=1 to isolate).
+Taking and comparing snapshots costs a few seconds per stage call on a large
+heap: use profiling to find where time goes, not to time a whole run.
+"""
+
+import os
+import re
+import time
+import cProfile
+import threading
+import tracemalloc
+from datetime import datetime
+
+PROFILE_DIR = os.path.join("output", "profile")
+
+# Allocation sites listed per stage call
+TOP_ALLOCATIONS = 25
+
+class StageProfiler:
+    """Profiles stage functions and aggregates a per-stage summary"""
+
+    def __init__(self, output_dir=PROFILE_DIR):
+        self.run_dir = os.path.join(output_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.stats = {}   # stage -> {'calls', 'wall', 'cpu', 'alloc'}
+        self._lock = threading.Lock()
+        self._count = 0
+        tracemalloc.start()
+
+    def wrap(self, name, func):
+        """Return func profiled as stage `name`"""
+        def run(job):
+            label = self._label(name, job)
+            profiler = cProfile.Profile()
+            before = tracemalloc.take_snapshot()
+            started, cpu_started = time.perf_counter(), time.thread_time()
+
+            profiler.enable()
+            try:
+                return func(job)
+            finally:
+                profiler.disable()
+                wall = time.perf_counter() - started
+                cpu = time.thread_time() - cpu_started
+                after = tracemalloc.take_snapshot()
+                self._record(name, label, profiler, before, after, wall, cpu)
+
+        return run
+
+    def _label(self, name, job):
+        with self._lock:
+            self._count += 1
+            count = self._count
+        entry_id = re.sub(r'[^A-Za-z0-9_-]', '', str(job.get('entry', {}).get('id', '')))[:12]
+        return f"{count:03d}-{name}-{entry_id or 'job'}"
+
+    def _record(self, name, label, profiler, before, after, wall, cpu):
+        profiler.dump_stats(os.path.join(self.run_dir, f"{label}.prof"))
+
+        # Snapshots are compared unfiltered (filter_traces is slow on big heaps)
+        diff = after.compare_to(before, 'lineno')
+        net = sum(stat.size_diff for stat in diff)
+        top = [stat for stat in diff
+               if stat.traceback[0].filename != tracemalloc.__file__][:TOP_ALLOCATIONS]
+        with open(os.path.join(self.run_dir, f"{label}.alloc.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"{label}: wall {wall:.3f}s, cpu {cpu:.3f}s, "
+                    f"net allocated {net / 1024:.1f} KiB\n\n")
+            for stat in top:
+                f.write(f"{stat}\n")
+
+        with self._lock:
+            stats = self.stats.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'alloc': 0})
+            stats['calls'] += 1
+            stats['wall'] += wall
+            stats['cpu'] += cpu
+            stats['alloc'] += net
+
+    def report(self):
+        """Print and save the per-stage summary, stop tracemalloc"""
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        lines = [f"{'Stage':<12}{'Calls':>6}{'Wall (s)':>10}{'CPU (s)':>10}{'CPU %':>7}{'Alloc (MiB)':>13}"]
+        for name, stats in self.stats.items():
+            cpu_pct = stats['cpu'] / stats['wall'] * 100 if stats['wall'] else 0
+            lines.append(f"{name:<12}{stats['calls']:>6}{stats['wall']:>10.2f}"
+                         f"{stats['cpu']:>10.2f}{cpu_pct:>6.0f}%"
+                         f"{stats['alloc'] / (1024 * 1024):>13.2f}")
+        lines.append(f"\nPeak traced memory: {peak / (1024 * 1024):.1f} MiB")
+        lines.append(f"Profiles: {self.run_dir} (open .prof files with "
+                     f"`python -m pstats` or snakeviz)")
+        summary = "\n".join(lines)
+
+        with open(os.path.join(self.run_dir, "summary.txt"), 'w', encoding='utf-8') as f:
+            f.write(summary + "\n")
+        print(f"\n{'='*60}\nPROFILE\n{'='*60}\n{summary}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Shortest-job-first scheduling of pending entries.
+
+Each entry's processing cost is estimated before it runs (video duration from
+yt-dlp metadata, article size from the HTTP cache or a HEAD request), then
+entries are ordered cheapest first to minimize mean completion time. Waiting
+time lowers an entry's score (aging) so long jobs are never starved, and a
+Notion "Priority" property overrides the order.
+"""
+
+import os
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http_cache import get_session, load_cached
+
+# Rough cost model, in estimated processing seconds
+BASE_COST = {"Youtube video": 60, "Article": 30, "Podcast": 120}
+DEFAULT_COST = 120
+VIDEO_COST_PER_SECOND = 0.1     # transcript + summary per second of video
+PODCAST_COST_PER_SECOND = 0.5   # local Whisper transcription is much slower
+ARTICLE_COST_PER_KB = 0.5       # per KB of HTML
+
+# Seconds of estimated cost forgiven per second spent waiting. Small enough
+# that cost still decides over backlogs days old (a day of waiting forgives
+# about 7 minutes), large enough that a long video overtakes a steady stream
+# of fresh articles after a few days instead of starving.
+AGING_RATE = float(os.getenv("SCHEDULER_AGING_RATE", "0.005"))
+
+ESTIMATE_WORKERS = 8
+HEAD_TIMEOUT = 5
+
+# url -> estimated cost, kept for the life of the process
+_cost_cache = {}
+
+def _media_duration(url):
+    # Cached in youtube_transcript, so extracting the video later reuses it
+    from youtube_transcript import get_video_info
+    return get_video_info(url).get('duration') or 0
+
+def _article_size(url):
+    """Size of the article HTML: cached body if any, else Content-Length from HEAD"""
+    _, body = load_cached(url)
+    if body is not None:
+        return len(body)
+
+    response = get_session().head(url, allow_redirects=True, timeout=HEAD_TIMEOUT)
+    length = response.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+def estimate_cost(entry):
+    """Estimated processing time of an entry in seconds"""
+    url = entry.get('url')
+    if not url:
+        return 0
+    if url in _cost_cache:
+        return _cost_cache[url]
+
+    content_type = entry.get('type')
+    cost = BASE_COST.get(content_type, DEFAULT_COST)
+    try:
+        if content_type == "Youtube video":
+            cost += _media_duration(url) * VIDEO_COST_PER_SECOND
+        elif content_type == "Podcast":
+            cost += _media_duration(url) * PODCAST_COST_PER_SECOND
+        elif content_type == "Article":
+            size = _article_size(url)
+            if size is not None:
+                cost += size / 1024 * ARTICLE_COST_PER_KB
+    except Exception as e:
+        print(f"  Cost estimate failed for {url}: {e}")
+
+    _cost_cache[url] = cost
+    return cost
+
+def _created_at(entry):
+    created_time = entry.get('created_time')
+    if not created_time:
+        return None
+    try:
+        return datetime.fromisoformat(created_time.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+def order_entries(entries, now=None):
+    """
+    Return entries ordered for processing.
+
+    Higher Notion priority first; within a priority, lowest score first where
+    score = estimated cost - AGING_RATE * seconds waited.
+    """
+    entries = list(entries)
+    if not entries:
+        return entries
+    now = now or time.time()
+
+    with ThreadPoolExecutor(max_workers=ESTIMATE_WORKERS) as pool:
+        costs = list(pool.map(estimate_cost, entries))
+
+    def sort_key(item):
+        entry, cost = item
+        created_at = _created_at(entry)
+        waited = max(now - created_at, 0) if created_at else 0
+        return (-(entry.get('priority') or 0), cost - AGING_RATE * waited)
+
+    ordered = sorted(zip(entries, costs), key=sort_key)
+    return [entry for entry, _ in ordered]
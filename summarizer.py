@@ -1,12 +1,26 @@
 import os
-import subprocess
 from dotenv import load_dotenv
+from tracing import span
+import hedging
+import circuit_breaker
+import artifact_store
 
 load_dotenv()
 
+# Claude Code CLI executable
+CLAUDE_BIN = os.getenv("CLAUDE_BIN", "/Users/mac/.local/bin/claude")
+
 # ~4 chars per token, limit at 90K tokens = 360K chars
+CHARS_PER_TOKEN = 4
 MAX_CHARS_PER_CHUNK = 360000
 
+# Optional local extractive pass (extractive.py): content above the threshold
+# is cut down to the target budget before chunking, so it needs fewer
+# `claude -p` calls and a smaller merge
+PRECOMPRESS = os.getenv("PRECOMPRESS", "0") == "1"
+PRECOMPRESS_THRESHOLD_TOKENS = int(os.getenv("PRECOMPRESS_THRESHOLD_TOKENS", "90000"))
+PRECOMPRESS_TARGET_TOKENS = int(os.getenv("PRECOMPRESS_TARGET_TOKENS", "80000"))
+
 def count_words(text):
     """Count words in text"""
     return len(text.split())
@@ -61,6 +75,73 @@ def chunk_content(content, max_chars=MAX_CHARS_PER_CHUNK):
 
     return chunks
 
+def precompress(content):
+    """
+    Shrink oversized content with the extractive pass.
+
+    The header (title, source... up to the first ---) is kept as is.
+    Returns (content, report), report being None when nothing was done.
+    """
+    if not PRECOMPRESS or len(content) <= PRECOMPRESS_THRESHOLD_TOKENS * CHARS_PER_TOKEN:
+        return content, None
+
+    from extractive import compress
+
+    header, separator, body = content.partition('\n---\n')
+    if not separator:
+        header, body = "", content
+    else:
+        header += separator + '\n'
+        body = body.lstrip('\n')
+
+    target_chars = PRECOMPRESS_TARGET_TOKENS * CHARS_PER_TOKEN - len(header)
+    with span("precompress", input_chars=len(content),
+              chunks_before=len(chunk_content(content))) as attrs:
+        body, report = compress(body, target_chars)
+        content = header + body
+        report['original_chars'] = attrs['input_chars']
+        report['compressed_chars'] = attrs['output_chars'] = len(content)
+        report['ratio'] = attrs['ratio'] = round(len(content) / attrs['input_chars'], 3)
+        report['chunks_before'] = attrs['chunks_before']
+        report['chunks_after'] = attrs['chunks_after'] = len(chunk_content(content))
+        if report.get('fallback'):
+            attrs['fallback'] = report['fallback']
+
+    if report.get('fallback'):
+        print(f"Pre-compression skipped ({report['fallback']}), content kept as is")
+        return content, report
+
+    print(f"Pre-compressed: {report['original_chars']:,} -> {report['compressed_chars']:,} chars "
+          f"({report['ratio']:.0%}), {report['kept_sentences']}/{report['sentences']} sentences, "
+          f"{report['chunks_before']} -> {report['chunks_after']} chunk(s) in {report['seconds']}s")
+    return content, report
+
+def _call_claude(prompt, kind, size, **attrs):
+    """
+    Run `claude -p` on a prompt and return its output.
+
+    The call is timed as a span named kind, goes through the llm circuit
+    breaker, and is hedged by input size (size: characters of content).
+    """
+    with span(kind, input_chars=size, **attrs) as span_attrs:
+        with circuit_breaker.guard("llm") as call:
+            result = hedging.run(
+                [CLAUDE_BIN, "-p", prompt, "--dangerously-skip-permissions"],
+                kind,
+                timeout=300,
+                attrs=span_attrs,
+                size=size
+            )
+            if result.returncode != 0:
+                call.fail(result.stderr)
+
+        if result.returncode != 0:
+            raise Exception(f"Claude Code error: {result.stderr}")
+
+        output = result.stdout.strip()
+        span_attrs['output_chars'] = len(output)
+    return output
+
 def summarize_chunk(content, content_type, title, chunk_num, total_chunks, word_count, summary_length):
     """Summarize a single chunk of content using Claude Code CLI"""
     title_context = f"Title: {title}\n\n" if title else ""
@@ -88,17 +169,8 @@ Instructions:
 
 Summary:"""
 
-    result = subprocess.run(
-        ["/Users/mac/.local/bin/claude", "-p", prompt, "--dangerously-skip-permissions"],
-        capture_output=True,
-        text=True,
-        timeout=300
-    )
-
-    if result.returncode != 0:
-        raise Exception(f"Claude Code error: {result.stderr}")
-
-    return result.stdout.strip()
+    return _call_claude(prompt, "summarize_chunk", len(content),
+                        chunk=chunk_num, chunks=total_chunks)
 
 def merge_summaries(summaries, title, content_type, target_length):
     """Merge multiple chunk summaries into one cohesive summary using Claude Code CLI"""
@@ -125,23 +197,15 @@ Instructions:
 
 Merged Summary:"""
 
-    result = subprocess.run(
-        ["/Users/mac/.local/bin/claude", "-p", prompt, "--dangerously-skip-permissions"],
-        capture_output=True,
-        text=True,
-        timeout=300
-    )
-
-    if result.returncode != 0:
-        raise Exception(f"Claude Code error: {result.stderr}")
-
-    return result.stdout.strip()
+    return _call_claude(prompt, "merge", len(combined), chunks=len(summaries))
 
 def summarize(content, content_type="Article", title=None):
     """Generate a summary of the content with Claude, handling chunking for long content"""
+    # Summary length follows the original content, even when pre-compressed
     word_count = count_words(content)
     summary_length = get_summary_length(content_type, word_count)
 
+    content, _ = precompress(content)
     chunks = chunk_content(content)
     print(f"Content split into {len(chunks)} chunk(s)")
 
@@ -160,9 +224,8 @@ def summarize(content, content_type="Article", title=None):
     return merge_summaries(summaries, title, content_type, summary_length)
 
 def summarize_file(filepath, content_type="Article"):
-    """Read a .md file and generate its summary"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    """Read a .md file and generate its summary (saved to the artifact store)"""
+    content = artifact_store.read_text(filepath)
 
     # Extract title from file (first # line)
     lines = content.split('\n')
@@ -182,16 +245,18 @@ def summarize_file(filepath, content_type="Article"):
     summary_minutes = estimate_audio_minutes(summary_words)
 
     # Save summary
-    output_path = filepath.replace('.md', '_summary.md')
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"# Summary: {title or 'Untitled'}\n\n")
-        f.write(f"**Type:** {content_type}\n")
-        f.write(f"**Original:** {word_count} words (~{estimated_minutes:.1f} min)\n")
-        f.write(f"**Summary:** {summary_words} words (~{summary_minutes:.1f} min audio)\n")
-        f.write(f"**Source:** {filepath}\n\n")
-        f.write("---\n\n")
-        f.write(summary)
+    source_name = artifact_store.display_name(filepath)
+    output_path = artifact_store.put_text(
+        f"# Summary: {title or 'Untitled'}\n\n"
+        f"**Type:** {content_type}\n"
+        f"**Original:** {word_count} words (~{estimated_minutes:.1f} min)\n"
+        f"**Summary:** {summary_words} words (~{summary_minutes:.1f} min audio)\n"
+        f"**Source:** {source_name}\n\n"
+        "---\n\n"
+        + summary,
+        source_name.replace('.md', '_summary.md'),
+        kind="summary",
+    )
 
     print(f"Summary saved: {output_path}")
     print(f"Summary length: {summary_words} words (~{summary_minutes:.1f} min audio)")
@@ -0,0 +1,49 @@
+"""Extractive pre-compression never throws the content away"""
+
+import random
+
+import numpy as np
+
+import extractive
+import summarizer
+
+WORDS = [f"term{i}" for i in range(3000)]
+
+def caption_transcript(words, seed=0):
+    """Auto-caption style: lowercase words, no punctuation, one paragraph"""
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def test_select_skips_a_sentence_too_long_for_the_budget():
+    # Sentence 0 is the most relevant but doesn't fit; the others must still be kept
+    matrix = np.array([[1, 0], [0.9, 0.44], [0.8, 0.6], [0.6, 0.8]], dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    selected = extractive._select(matrix, [500, 40, 40, 40], budget=100)
+
+    assert 0 not in selected
+    assert len(selected) == 2
+
+def test_unpunctuated_transcript_is_compressed_not_emptied():
+    content = caption_transcript(60000)
+    compressed, report = extractive.compress(content, 100000)
+
+    assert extractive.MIN_FILL * 100000 <= len(compressed) <= 100000
+    assert report['kept_sentences'] > 0
+    assert 'fallback' not in report
+
+def test_nothing_scorable_returns_the_content_unchanged():
+    content = ' '.join(["Yeah.", "Ok so.", "Right."] * 5000)
+    compressed, report = extractive.compress(content, 1000)
+
+    assert compressed == content
+    assert report['fallback']
+
+def test_precompress_keeps_the_body(monkeypatch):
+    monkeypatch.setattr(summarizer, 'PRECOMPRESS', True)
+    monkeypatch.setattr(summarizer, 'PRECOMPRESS_THRESHOLD_TOKENS', 10000)
+    monkeypatch.setattr(summarizer, 'PRECOMPRESS_TARGET_TOKENS', 8000)
+    header = "# Video\n\n**Source:** https://youtube.com/watch?v=aVHMqoGtqKM\n\n---\n\n"
+    content, report = summarizer.precompress(header + caption_transcript(20000))
+
+    assert content.startswith(header)
+    assert len(content) - len(header) > summarizer.PRECOMPRESS_TARGET_TOKENS * summarizer.CHARS_PER_TOKEN * extractive.MIN_FILL
@@ -0,0 +1,47 @@
+"""Hedging latency history is seeded from the span log"""
+
+import json
+
+import pytest
+
+import hedging
+import tracing
+
+@pytest.fixture
+def span_log(monkeypatch, tmp_path):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(tracing, 'SPAN_LOG', str(path))
+    monkeypatch.setattr(hedging, 'trackers', {})
+    monkeypatch.setattr(hedging, 'HEDGE_MIN_SAMPLES', 20)
+    monkeypatch.setattr(hedging, 'HEDGE_MIN_DELAY', 0)
+    return path
+
+def write_spans(path, spans):
+    with open(path, "a") as f:
+        for name, duration, status, attrs in spans:
+            f.write(json.dumps({"name": name, "duration": duration,
+                                "status": status, "attrs": attrs}) + "\n")
+
+def test_history_is_seeded_from_logged_calls(span_log):
+    write_spans(span_log, [("summarize_chunk", 1.0 + i, "ok", {"input_chars": 2000})
+                           for i in range(20)])
+
+    assert hedging.tracker("summarize_chunk").hedge_delay(2000) == 20.0
+    assert hedging.tracker("merge").hedge_delay(2000) is None
+
+def test_failed_and_hedged_calls_are_not_seeded(span_log):
+    write_spans(span_log, [("summarize_chunk", 1.0, "ok", {"input_chars": 2000})] * 18)
+    write_spans(span_log, [
+        ("summarize_chunk", 300.0, "error", {"input_chars": 2000}),
+        ("summarize_chunk", 90.0, "ok", {"input_chars": 2000, "hedged": True}),
+    ])
+
+    assert hedging.tracker("summarize_chunk").hedge_delay(2000) is None
+
+def test_rotated_log_is_read_when_the_current_one_is_short(span_log):
+    rotated = span_log.parent / "spans.jsonl.1"
+    write_spans(rotated, [("merge", 2.0, "ok", {"input_chars": 5000})] * 15)
+    write_spans(span_log, [("merge", 4.0, "ok", {"input_chars": 5000})] * 5)
+
+    assert len(tracing.recent_spans("merge", 200)) == 20
+    assert hedging.tracker("merge").hedge_delay(5000) == 4.0
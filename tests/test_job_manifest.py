@@ -0,0 +1,74 @@
+"""Stage checkpoints survive eviction of local files once results are uploaded"""
+
+import os
+
+import pytest
+
+import job_manifest
+
+@pytest.fixture
+def manifest(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_manifest, 'MANIFEST_DIR', str(tmp_path / "jobs"))
+    manifest = job_manifest.load_manifest("youtube:aVHMqoGtqKM", "https://youtu.be/aVHMqoGtqKM")
+    for stage, key in (("extract", "filepath"), ("summarize", "summary_path"),
+                       ("tts", "audio_path")):
+        path = tmp_path / f"{stage}.out"
+        path.write_text(stage)
+        job_manifest.record_stage(manifest, stage, {key: str(path)}, [key])
+    return manifest
+
+def evict(manifest):
+    for record in manifest['stages'].values():
+        for artifact in record['artifacts'].values():
+            os.remove(artifact['path'])
+
+def test_evicted_files_invalidate_stages_before_upload(manifest):
+    evict(manifest)
+    assert job_manifest.completed_stage(manifest, "extract") is None
+    assert job_manifest.completed_stage(manifest, "tts") is None
+
+def test_uploaded_results_keep_earlier_stages_done(manifest):
+    job_manifest.record_stage(manifest, "upload", {'drive_link': "https://drive/1"})
+    evict(manifest)
+
+    for stage in ("extract", "summarize", "tts"):
+        assert job_manifest.completed_stage(manifest, stage) is None
+        assert job_manifest.uploaded_stage(manifest, stage) is not None
+    assert job_manifest.completed_stage(manifest, "upload") == {'drive_link': "https://drive/1"}
+
+def test_rerunning_a_stage_drops_the_upload(manifest, tmp_path):
+    job_manifest.record_stage(manifest, "upload", {'drive_link': "https://drive/1"})
+    path = tmp_path / "summary2.out"
+    path.write_text("new summary")
+    job_manifest.record_stage(manifest, "summarize", {'summary_path': str(path)}, ['summary_path'])
+
+    assert job_manifest.completed_stage(manifest, "upload") is None
+
+def test_page_enqueued_again_gets_the_links_again(manifest, monkeypatch, tmp_path):
+    import circuit_breaker
+    import process_all
+
+    monkeypatch.setattr(circuit_breaker, 'DB_PATH', str(tmp_path / "breakers.db"))
+    monkeypatch.setattr(process_all.artifact_store, 'mark_delivered', lambda paths: None)
+    monkeypatch.setattr(process_all.artifact_store, 'enforce_quota', lambda: set())
+    updated = []
+    monkeypatch.setattr(process_all, 'update_text_summary', lambda page_id, *a: True)
+    monkeypatch.setattr(process_all, 'update_audio_summary', lambda page_id, *a: True)
+    monkeypatch.setattr(process_all, 'update_page_title',
+                        lambda page_id, title: updated.append(page_id) or True)
+    job_manifest.record_stage(manifest, "upload", {'drive_link': "https://drive/1",
+                                                   'audio_drive_link': "https://drive/2"})
+    entry = {'id': "page-1", 'url': manifest['url'], 'canonical_key': manifest['key']}
+    notion = dict(process_all.CHECKPOINTED_STAGES)["notion"]
+
+    def run_job():
+        job = {'entry': entry, 'title': "Talk", 'filepath': "extract.out",
+               'summary_path': "summarize.out", 'audio_path': "tts.out",
+               'drive_link': "https://drive/1", 'audio_drive_link': "https://drive/2"}
+        return notion(job)
+
+    run_job()
+    # The page's results were cleared in Notion and it is pending again
+    run_job()
+
+    assert updated == ["page-1", "page-1"]
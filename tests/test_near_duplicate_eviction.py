@@ -0,0 +1,73 @@
+"""Evicted originals are not reused for near-duplicates"""
+
+import random
+
+import pytest
+
+import artifact_store
+import circuit_breaker
+import job_manifest
+import near_duplicates
+import process_all
+
+WORDS = [f"word{i}" for i in range(400)]
+
+def article(seed, changed=0):
+    words = random.Random(seed).choices(WORDS, k=400)
+    for i in range(changed):
+        words[i * 40] = "changed"
+    return " ".join(words)
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    monkeypatch.setattr(artifact_store, 'ARTIFACT_DIR', str(tmp_path / "output"))
+    monkeypatch.setattr(job_manifest, 'MANIFEST_DIR', str(tmp_path / "jobs"))
+    monkeypatch.setattr(near_duplicates, 'DB_PATH', str(tmp_path / "near_duplicates.db"))
+    monkeypatch.setattr(circuit_breaker, 'DB_PATH', str(tmp_path / "breakers.db"))
+    monkeypatch.setattr(process_all, '_near_duplicate_index', None)
+    summaries = []
+
+    def save_article(url):
+        text = article(1, changed=2 if "mirror" in url else 0)
+        path = artifact_store.put_text(f"# {url}\n\n---\n{text}", f"{url.split('/')[2]}.md",
+                                       kind="transcript")
+        return path, url
+
+    def summarize_file(filepath, content_type):
+        summaries.append(filepath)
+        text = f"Summary of {artifact_store.read_text(filepath)[:20]}"
+        return artifact_store.put_text(text, "summary.md", kind="summary"), None
+
+    def generate_audio(summary_path):
+        tmp = artifact_store.temp_path(".mp3")
+        with open(tmp, "wb") as f:
+            f.write(artifact_store.read_text(summary_path).encode() * 100)
+        return artifact_store.put_file(tmp, "summary.mp3", kind="audio")
+
+    monkeypatch.setattr(process_all, 'save_article', save_article)
+    monkeypatch.setattr(process_all, 'summarize_file', summarize_file)
+    monkeypatch.setattr(process_all, 'generate_audio_from_summary', generate_audio)
+    monkeypatch.setattr(process_all, 'upload_to_drive', lambda path: ("id", f"https://drive/{path}"))
+    for update in ('update_text_summary', 'update_audio_summary', 'update_page_title'):
+        monkeypatch.setattr(process_all, update, lambda *args: True)
+    return summaries
+
+def entry(page_id, url):
+    return {'id': page_id, 'name': url, 'url': url, 'type': "Article"}
+
+def test_near_duplicate_of_an_evicted_original_is_summarized_again(pipeline, monkeypatch):
+    # Every delivered artifact is evicted as soon as its job ends
+    monkeypatch.setattr(artifact_store, 'ARTIFACT_QUOTA_MB', 1e-6)
+
+    assert process_all.process_entry(entry("page-1", "https://example.com/post"))
+    assert len(process_all.near_duplicate_index()) == 0
+
+    assert process_all.process_entry(entry("page-2", "https://mirror.example.org/post"))
+    assert len(pipeline) == 2
+
+def test_near_duplicate_of_a_kept_original_reuses_its_summary(pipeline):
+    assert process_all.process_entry(entry("page-1", "https://example.com/post"))
+    assert len(process_all.near_duplicate_index()) == 1
+
+    assert process_all.process_entry(entry("page-2", "https://mirror.example.org/post"))
+    assert len(pipeline) == 1
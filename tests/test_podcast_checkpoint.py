@@ -0,0 +1,30 @@
+"""Whisper transcription resumes from its segment checkpoint without losing segments"""
+
+import json
+from types import SimpleNamespace
+
+import podcast_transcript
+
+SEGMENTS = [(0.0, 4.0, "First."), (4.0, 9.0, "Second."), (9.0, 12.0, "Third.")]
+
+class FakeModel:
+    """Yields the SEGMENTS that start at or after the clip timestamp"""
+
+    def transcribe(self, audio_path, beam_size, language, clip_timestamps):
+        start = clip_timestamps[0]
+        segments = (SimpleNamespace(start=s, end=e, text=t) for s, e, t in SEGMENTS if s >= start)
+        return segments, SimpleNamespace(language="en", language_probability=1.0)
+
+def test_resume_after_a_partial_last_line(monkeypatch, tmp_path):
+    monkeypatch.setattr(podcast_transcript, 'get_whisper_model', lambda size: FakeModel())
+    checkpoint = tmp_path / "episode.mp3.segments.jsonl"
+    first = json.dumps({'start': 0.0, 'end': 4.0, 'text': "First."})
+    # The process died while writing the second segment
+    checkpoint.write_text(json.dumps({'language': "en"}) + "\n" + first + "\n" + '{"start": 4.0, "en')
+
+    text, language = podcast_transcript.transcribe_audio(
+        str(tmp_path / "episode.mp3"), checkpoint_path=str(checkpoint))
+
+    assert (text, language) == ("First. Second. Third.", "en")
+    _, segments = podcast_transcript.load_checkpoint(str(checkpoint))
+    assert [s['text'] for s in segments] == ["First.", "Second.", "Third."]
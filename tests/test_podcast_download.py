@@ -0,0 +1,89 @@
+"""download_enclosure() against a local HTTP server: ranged, no-Range and short reads"""
+
+import os
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import podcast_transcript
+
+PAYLOAD = os.urandom(1024 * 1024 + 12345)
+
+class EnclosureHandler(BaseHTTPRequestHandler):
+    # Set per test on the server: honour Range headers, and the statuses whose
+    # responses send fewer bytes than announced
+    def do_GET(self):
+        body, status, headers = PAYLOAD, 200, {}
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get('Range', ''))
+        if match and self.server.ranges:
+            start, end = int(match.group(1)), int(match.group(2))
+            body, status = PAYLOAD[start:end + 1], 206
+            headers['Content-Range'] = f"bytes {start}-{end}/{len(PAYLOAD)}"
+        self.server.requests.append((status, self.headers.get('Range')))
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:len(body) // 2] if status in self.server.short else body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), EnclosureHandler)
+    httpd.ranges, httpd.short, httpd.requests = True, set(), []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    monkeypatch.setattr(podcast_transcript, 'MIN_PART_SIZE', 64 * 1024)
+    monkeypatch.setattr(podcast_transcript, '_session', None)
+
+def url_of(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/episode.mp3"
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+@pytest.fixture
+def download_dir(tmp_path):
+    return str(tmp_path / "downloads")
+
+def test_ranged_download(server, download_dir):
+    path = podcast_transcript.download_enclosure(url_of(server), download_dir)
+
+    assert read(path) == PAYLOAD
+    ranged = [r for status, r in server.requests if status == 206 and r != 'bytes=0-0']
+    assert len(ranged) == podcast_transcript.DOWNLOAD_PARTS
+    assert not os.path.exists(path + '.part')
+
+def test_no_range_support_falls_back_to_single_stream(server, download_dir):
+    server.ranges = False
+    path = podcast_transcript.download_enclosure(url_of(server), download_dir)
+
+    assert read(path) == PAYLOAD
+    assert all(status == 200 for status, _ in server.requests)
+
+def test_short_range_falls_back_to_single_stream(server, download_dir):
+    server.short = {206}
+    path = podcast_transcript.download_enclosure(url_of(server), download_dir)
+
+    assert read(path) == PAYLOAD
+    assert server.requests[-1] == (200, None)
+
+def test_short_read_fails_without_leaving_files(server, download_dir):
+    server.ranges, server.short = False, {200}
+    with pytest.raises(Exception):
+        podcast_transcript.download_enclosure(url_of(server), download_dir)
+
+    assert os.listdir(download_dir) == []
@@ -0,0 +1,68 @@
+"""Shortest-job-first ordering with aging"""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import scheduler
+import youtube_transcript
+
+DAY = 86400
+
+media_duration = scheduler._media_duration
+
+@pytest.fixture(autouse=True)
+def durations(monkeypatch):
+    monkeypatch.setattr(scheduler, '_cost_cache', {})
+    monkeypatch.setattr(scheduler, '_media_duration', lambda url: 4 * 3600)
+    monkeypatch.setattr(scheduler, '_article_size', lambda url: 20 * 1024)
+
+def entry(name, content_type, age, now):
+    created = datetime.fromtimestamp(now - age, timezone.utc).isoformat()
+    return {'id': name, 'url': f"https://example.com/{name}", 'type': content_type,
+            'created_time': created.replace('+00:00', 'Z')}
+
+def test_short_new_job_overtakes_long_older_one():
+    now = time.time()
+    video = entry("video", "Youtube video", 2 * DAY, now)
+    article = entry("article", "Article", 0, now)
+
+    ordered = scheduler.order_entries([video, article], now)
+
+    assert [e['id'] for e in ordered] == ["article", "video"]
+
+def test_long_job_is_not_starved():
+    now = time.time()
+    video = entry("video", "Youtube video", 7 * DAY, now)
+    article = entry("article", "Article", 0, now)
+
+    ordered = scheduler.order_entries([article, video], now)
+
+    assert [e['id'] for e in ordered] == ["video", "article"]
+
+def test_duration_probe_is_reused_by_extract(monkeypatch):
+    probes = []
+
+    class FakeYoutubeDL:
+        def __init__(self, opts):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            probes.append(url)
+            return {'title': "Talk", 'channel': "Channel", 'duration': 600}
+
+    import yt_dlp
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+    monkeypatch.setattr(youtube_transcript, '_info_cache', {})
+    url = "https://youtube.com/watch?v=aVHMqoGtqKM"
+
+    assert media_duration(url) == 600
+    assert youtube_transcript.get_video_info(url)['title'] == "Talk"
+    assert probes == [url]
@@ -0,0 +1,29 @@
+"""Canonical keys of YouTube and other URLs"""
+
+import pytest
+
+from url_canon import canonical_key, youtube_video_id
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=aVHMqoGtqKM&t=30",
+    "https://m.youtube.com/watch?v=aVHMqoGtqKM",
+    "https://music.youtube.com/watch?v=aVHMqoGtqKM",
+    "https://youtu.be/aVHMqoGtqKM?si=abc",
+    "https://www.youtube.com/shorts/aVHMqoGtqKM",
+    "https://www.youtube-nocookie.com/embed/aVHMqoGtqKM",
+])
+def test_youtube_urls_reduce_to_the_video_id(url):
+    assert canonical_key(url) == "youtube:aVHMqoGtqKM"
+
+@pytest.mark.parametrize("url", [
+    "https://notyoutube.com/watch?v=aVHMqoGtqKM",
+    "https://youtube.com.evil.example/watch?v=aVHMqoGtqKM",
+    "https://notyoutu.be/aVHMqoGtqKM",
+])
+def test_lookalike_hosts_are_not_youtube(url):
+    assert youtube_video_id(url) is None
+    assert canonical_key(url).startswith("url:")
+
+def test_mobile_prefix_is_only_stripped_for_youtube():
+    assert canonical_key("https://m.example.com/post/") == "url:https://m.example.com/post"
+    assert canonical_key("https://www.example.com/post?utm_source=x") == "url:https://example.com/post"
@@ -0,0 +1,51 @@
+"""Unavailable videos don't count against the YouTube circuit breaker"""
+
+import pytest
+import yt_dlp
+from yt_dlp.utils import DownloadError, ExtractorError
+
+import circuit_breaker
+import youtube_transcript
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch, tmp_path):
+    monkeypatch.setattr(circuit_breaker, 'DB_PATH', str(tmp_path / "breakers.db"))
+    monkeypatch.setattr(circuit_breaker, 'BREAKER_FAILURES', 3)
+
+def failing_ydl(monkeypatch, message, expected):
+    cause = ExtractorError(message, expected=expected)
+
+    class FailingYoutubeDL:
+        def __init__(self, opts):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            raise DownloadError(f"ERROR: {message}", (type(cause), cause, None))
+
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', FailingYoutubeDL)
+
+def test_private_videos_leave_the_breaker_closed(monkeypatch):
+    failing_ydl(monkeypatch, "[youtube] abc: Private video", expected=True)
+    for _ in range(5):
+        with pytest.raises(youtube_transcript.VideoUnavailable):
+            youtube_transcript.get_video_info("https://youtube.com/watch?v=aVHMqoGtqKM")
+
+    assert circuit_breaker.blocked(["youtube"]) is None
+
+@pytest.mark.parametrize("message, expected", [
+    ("Sign in to confirm you're not a bot", True),
+    ("Unable to download webpage: timed out", False),
+])
+def test_blocking_and_network_errors_open_the_breaker(monkeypatch, message, expected):
+    failing_ydl(monkeypatch, message, expected)
+    for _ in range(3):
+        with pytest.raises(DownloadError):
+            youtube_transcript.get_video_info("https://youtube.com/watch?v=aVHMqoGtqKM")
+
+    assert circuit_breaker.blocked(["youtube"])[0] == "youtube"
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Timing spans for the pipeline stages.
+
+Each span (extract, summarize chunk, merge, TTS, upload, Notion call...) is
+appended to a JSON-lines log with its duration, outcome and size attributes.
+Worker processes also keep the spans of the current job in memory so they
+can be sent back to the webhook server with the job result (see metrics.py).
+"""
+
+import os
+import json
+import time
+import fcntl
+import threading
+from contextlib import contextmanager
+
+SPAN_LOG = os.getenv("SPAN_LOG", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".jobs", "spans.jsonl"))
+
+# The log is rotated past this size (spans.jsonl -> spans.jsonl.1 -> ...),
+# keeping SPAN_LOG_BACKUPS old files
+SPAN_LOG_MAX_MB = float(os.getenv("SPAN_LOG_MAX_MB", "50"))
+SPAN_LOG_BACKUPS = int(os.getenv("SPAN_LOG_BACKUPS", "3"))
+
+# Spans kept in memory between two drain() calls (when collecting)
+MAX_COLLECTED = 10000
+
+_write_lock = threading.Lock()
+_collected = None
+
+# Attributes added to every span started in this thread (page, content key)
+_context = threading.local()
+
+def start_collecting():
+    """Keep finished spans in memory until drain() is called"""
+    global _collected
+    with _write_lock:
+        if _collected is None:
+            _collected = []
+
+def drain():
+    """Return the spans collected since the last call, and forget them"""
+    global _collected
+    with _write_lock:
+        if _collected is None:
+            return []
+        spans, _collected = _collected, []
+    return spans
+
+@contextmanager
+def context(**attrs):
+    """Attach attrs to every span started by this thread inside the block"""
+    previous = getattr(_context, 'attrs', {})
+    _context.attrs = {**previous, **attrs}
+    try:
+        yield
+    finally:
+        _context.attrs = previous
+
+def _rotate():
+    """Shift the log to .1, .1 to .2 and so on, dropping the oldest"""
+    for i in range(SPAN_LOG_BACKUPS, 0, -1):
+        source = SPAN_LOG if i == 1 else f"{SPAN_LOG}.{i - 1}"
+        try:
+            os.replace(source, f"{SPAN_LOG}.{i}")
+        except FileNotFoundError:
+            pass  # not there yet
+    if SPAN_LOG_BACKUPS <= 0 and os.path.exists(SPAN_LOG):
+        os.remove(SPAN_LOG)
+
+def _write(record):
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _write_lock:
+        if _collected is not None and len(_collected) < MAX_COLLECTED:
+            _collected.append(record)
+        try:
+            os.makedirs(os.path.dirname(SPAN_LOG) or ".", exist_ok=True)
+            # Workers, the server and the watcher all append here: the size
+            # check, rotation and append happen under one lock across
+            # processes (a separate file, since rotation renames the log)
+            with open(f"{SPAN_LOG}.lock", "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if (SPAN_LOG_MAX_MB > 0 and os.path.exists(SPAN_LOG)
+                        and os.path.getsize(SPAN_LOG) >= SPAN_LOG_MAX_MB * 1024 * 1024):
+                    _rotate()
+                with open(SPAN_LOG, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            print(f"  Span log not written: {e}")
+
+def recent_spans(name, limit, max_bytes=4 * 1024 * 1024):
+    """
+    The last `limit` spans called name in the log (and its rotated files,
+    newest first, until enough are found), oldest first. At most max_bytes
+    are read from the end of each file.
+    """
+    found = []
+    paths = [SPAN_LOG] + [f"{SPAN_LOG}.{i}" for i in range(1, SPAN_LOG_BACKUPS + 1)]
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(size - max_bytes, 0))
+                lines = f.read().splitlines()
+        except OSError:
+            continue
+        if size > max_bytes:
+            lines = lines[1:]  # cut mid-line
+
+        spans = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("name") == name:
+                spans.append(record)
+        found = spans + found
+        if len(found) >= limit:
+            break
+    return found[-limit:]
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time the block as one span.
+
+    Yields the attribute dict, so sizes known only at the end (output chars,
+    audio bytes...) can be added inside the block. A span fails if the block
+    raises, or sets an http_status of 400 or more.
+    """
+    attrs = {**getattr(_context, 'attrs', {}), **attrs}
+    started = time.time()
+    start = time.perf_counter()
+    status, error = "ok", None
+    try:
+        yield attrs
+    except BaseException as e:
+        status, error = "error", str(e)[:500]
+        raise
+    finally:
+        if status == "ok" and attrs.get("http_status", 200) >= 400:
+            status = "error"
+        record = {
+            "name": name,
+            "start": round(started, 3),
+            "duration": round(time.perf_counter() - start, 4),
+            "status": status,
+            "attrs": attrs,
+        }
+        if error:
+            record["error"] = error
+        _write(record)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+URL canonicalization, so the same content is only processed once.
+
+YouTube URLs (youtu.be, m.youtube.com, watch?v=...&t=30, shorts, embeds)
+reduce to the video ID; other URLs lose tracking parameters, fragments and
+cosmetic differences (case, www., default port, trailing slash).
+"""
+
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+YOUTUBE_HOSTS = ("youtube.com", "youtu.be", "youtube-nocookie.com")
+
+# Query parameters that never change the content
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid",
+    "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "ref", "ref_src",
+    "ref_url", "source", "si", "spm", "cmpid", "s_cid", "__s",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+def _is_youtube_host(host):
+    return any(host == name or host.endswith("." + name) for name in YOUTUBE_HOSTS)
+
+def _strip_host(host):
+    """Lowercase host without www. (and without m./mobile. for YouTube only)"""
+    host = host.lower()
+    if host.startswith("www."):
+        return host[len("www."):]
+    for prefix in ("m.", "mobile."):
+        if host.startswith(prefix) and _is_youtube_host(host[len(prefix):]):
+            return host[len(prefix):]
+    return host
+
+def youtube_video_id(url):
+    """Video ID of a YouTube URL, or None"""
+    parts = urlsplit(url)
+    host = _strip_host(parts.hostname or "")
+    if not _is_youtube_host(host):
+        return None
+
+    if host == "youtu.be":
+        match = re.match(r"/([0-9A-Za-z_-]{11})", parts.path)
+        return match.group(1) if match else None
+
+    video_id = dict(parse_qsl(parts.query)).get("v")
+    if video_id and re.fullmatch(r"[0-9A-Za-z_-]{11}", video_id):
+        return video_id
+
+    match = re.match(r"/(?:shorts|embed|live|v)/([0-9A-Za-z_-]{11})", parts.path)
+    return match.group(1) if match else None
+
+def canonical_url(url):
+    """Normalize a URL: drop tracking params, fragment and cosmetic differences"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = _strip_host(parts.hostname or "")
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+
+    # http and https serve the same content: key on https
+    if scheme == "http":
+        scheme = "https"
+
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def canonical_key(url):
+    """Stable identity of the content behind a URL"""
+    if not url:
+        return None
+    video_id = youtube_video_id(url)
+    if video_id:
+        return f"youtube:{video_id}"
+    return f"url:{canonical_url(url)}"
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Long-lived pipeline worker processes for the webhook server.
+
+Each worker process imports the pipeline modules once and keeps its clients
+(Drive service, Whisper models...) warm between jobs. A job that runs past
+its timeout gets its process killed and replaced with a fresh one.
+
+The timing spans recorded during a job are sent back with its result.
+"""
+
+import os
+import importlib
+import threading
+import multiprocessing
+import tracing
+import circuit_breaker
+
+# Per-job timeout, defined with the queue lease that must outlast it
+from job_queue import JOB_TIMEOUT
+
+def run_job(page_id=None, url=None):
+    """Default job target: one entry, or every pending entry"""
+    if page_id and url:
+        from process_single import process_single
+        return process_single(page_id, url, raise_parked=True)
+
+    from process_all import main as process_all_main
+    process_all_main()
+    return True
+
+# Heavy libraries the stages import lazily; preloaded so jobs don't pay for them
+WARM_IMPORTS = [
+    'yt_dlp',
+    'youtube_transcript_api',
+    'trafilatura',
+    'edge_tts',
+    'aiohttp',
+    'googleapiclient.discovery',
+    'googleapiclient.http',
+]
+
+def warm_up():
+    """Import the pipeline and build clients before the first job arrives"""
+    import process_all  # noqa: F401
+    import drive_uploader
+
+    for module in WARM_IMPORTS:
+        importlib.import_module(module)
+
+    if os.path.exists('token.pickle'):
+        try:
+            drive_uploader.get_drive_service()
+        except Exception as e:
+            print(f"Drive warm-up failed: {e}")
+
+def _worker_main(conn, target, cwd):
+    """Child process loop: receive (page_id, url), send back (success, error, spans, parked)"""
+    os.chdir(cwd)
+    tracing.start_collecting()
+    warm_up()
+    tracing.drain()
+    conn.send(('ready', None))
+
+    while True:
+        try:
+            page_id, url = conn.recv()
+        except EOFError:
+            break
+
+        # parked: (breaker, retry_in) when the job stopped on an open circuit
+        parked = None
+        try:
+            success, error = bool(target(page_id, url)), None
+        except circuit_breaker.CircuitOpen as e:
+            success, error, parked = False, str(e), (e.name, e.retry_in)
+        except Exception as e:
+            success, error = False, str(e)
+        conn.send((success, error, tracing.drain(), parked))
+
+class WarmWorker:
+    """Parent-side handle on one warm worker process"""
+
+    def __init__(self, name, target=run_job, timeout=JOB_TIMEOUT):
+        self.name = name
+        self.target = target
+        self.timeout = timeout
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self._ready_lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self):
+        parent_conn, child_conn = self._context.Pipe()
+        self.process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.target, os.path.dirname(os.path.abspath(__file__))),
+            name=self.name,
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.ready = False
+
+    def wait_ready(self, timeout=120):
+        """Block until the worker has finished warming up (safe from several threads)"""
+        with self._ready_lock:
+            try:
+                if not self.ready and self.conn.poll(timeout):
+                    self.ready = self.conn.recv()[0] == 'ready'
+            except (EOFError, OSError):
+                self.ready = False
+            return self.ready
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.kill()
+        if self.conn is not None:
+            self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def run(self, page_id=None, url=None, timeout=None):
+        """
+        Run one job in the warm process, return (success, error, spans, parked).
+
+        parked is (breaker name, retry_in) if the job stopped because a
+        circuit breaker was open, else None.
+        """
+        timeout = timeout or self.timeout
+        try:
+            if self.process is None or not self.process.is_alive():
+                self.restart()
+            if not self.wait_ready():
+                self.restart()
+                return False, "Worker failed to warm up", [], None
+
+            self.conn.send((page_id, url))
+            if self.conn.poll(timeout):
+                return self.conn.recv()
+        except (EOFError, OSError) as e:
+            self.restart()
+            return False, f"Worker process died: {e}", [], None
+
+        print(f"{self.name}: job timed out after {timeout}s, restarting worker")
+        self.restart()
+        return False, f"Timed out after {timeout}s", [], None
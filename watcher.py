@@ -2,91 +2,233 @@
 """
 Watcher that polls Notion and processes new entries automatically.
 No need for n8n or ngrok - runs locally.
+
+New entries are dispatched to a bounded worker pool, so polling continues
+(and short articles aren't stuck behind a long video) while jobs run.
+
+Polling is adaptive: fast after activity, slower (with jitter) while idle.
+A POST to http://127.0.0.1:5051/wake triggers an immediate check.
 """
 
 import time
 import os
+import random
+import threading
 from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
 from notion_reader import get_database_entries, analyze_entries
 from process_all import process_entry
+from processed_store import ProcessedStore
+from scheduler import order_entries
+
+# Poll interval bounds: shrinks to the minimum after activity, grows while idle
+POLL_MIN_INTERVAL = int(os.getenv("WATCHER_POLL_MIN", "15"))
+POLL_MAX_INTERVAL = int(os.getenv("WATCHER_POLL_MAX", "600"))
+POLL_BACKOFF = 1.5
+POLL_JITTER = 0.2
+
+# Local wake-up endpoint (used by webhook_server /webhook/notify)
+WAKE_PORT = int(os.getenv("WATCHER_WAKE_PORT", "5051"))
+
+# Entries processed at the same time
+WATCHER_WORKERS = int(os.getenv("WATCHER_WORKERS", "2"))
+
+# Failed entries are retried after 2, 4, 8... minutes, up to 1 hour
+RETRY_BASE = 120
+RETRY_MAX = 3600
+
+# Expire old processed IDs once a day
+EXPIRE_INTERVAL = 86400
 
-# Check every 2 minutes (adjust as needed)
-POLL_INTERVAL = 120
+# Track processed entries to avoid duplicates (opened in main)
+processed_ids = None
 
-# Track processed entries to avoid duplicates
-processed_ids = set()
+# page_id -> (entry, started_at) for entries currently being processed
+in_flight = {}
 
-def load_processed_ids():
-    """Load previously processed IDs from file"""
-    cache_file = os.path.join(os.path.dirname(__file__), ".processed_ids")
-    if os.path.exists(cache_file):
-        with open(cache_file, "r") as f:
-            return set(line.strip() for line in f if line.strip())
-    return set()
+# page_id -> (failed_attempts, next_retry_at)
+failures = {}
 
-def save_processed_id(page_id):
-    """Save processed ID to file"""
-    cache_file = os.path.join(os.path.dirname(__file__), ".processed_ids")
-    with open(cache_file, "a") as f:
-        f.write(f"{page_id}\n")
+state_lock = threading.Lock()
+
+# Set to cut the current sleep short (wake-up ping or finished job)
+wake_event = threading.Event()
+
+executor = ThreadPoolExecutor(max_workers=WATCHER_WORKERS, thread_name_prefix="watcher")
+
+def expire_processed_ids():
+    """Forget processed IDs older than the retention period"""
+    expired = processed_ids.expire()
+    if expired:
+        print(f"Expired {expired} old processed ID(s)")
+
+def run_entry(entry):
+    """Process one entry in a worker thread and record the outcome"""
+    page_id = entry['id']
+    try:
+        success = process_entry(entry)
+    except Exception as e:
+        print(f"  Error: {e}")
+        success = False
+
+    # Recorded as processed before it leaves in_flight, under the same lock,
+    # so a concurrent check never sees it as neither running nor done
+    with state_lock:
+        if success:
+            processed_ids.add(page_id)
+        del in_flight[page_id]
+
+        if success:
+            failures.pop(page_id, None)
+        else:
+            attempts = failures.get(page_id, (0, 0))[0] + 1
+            delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+            failures[page_id] = (attempts, time.time() + delay)
+
+    if success:
+        print(f"  ✓ Done: {entry['name'][:50]}")
+    else:
+        print(f"  ✗ Failed: {entry['name'][:50]} (attempt {attempts}, retry in {delay // 60} min)")
+
+    # A slot is free: look for waiting entries right away
+    wake_event.set()
 
 def check_and_process():
-    """Check for new entries and process them"""
+    """
+    Check for new entries and dispatch them to the worker pool.
+
+    Returns True if there was activity (new entries found). Running jobs
+    don't count: a finished job wakes the loop by itself.
+    """
     print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Checking Notion...")
 
     try:
         entries = get_database_entries()
         to_process, _ = analyze_entries(entries)
-
-        # Filter out podcasts and already processed
-        new_entries = [
-            e for e in to_process
-            if e['type'] != "Podcast" and e['id'] not in processed_ids
-        ]
+        now = time.time()
+
+        with state_lock:
+            # Read under the lock: a job finishing in between is either still
+            # in flight or already recorded as processed
+            done = processed_ids.processed_among(e['id'] for e in to_process)
+            # Filter out podcasts, already processed, running and backing off.
+            # Entries with the same content as a running job wait for it: they
+            # are dispatched after it finishes and reuse its artifacts.
+            running_keys = {entry['canonical_key'] for entry, _ in in_flight.values()}
+            new_entries = [
+                e for e in to_process
+                if e['type'] != "Podcast"
+                and e['id'] not in done
+                and e['id'] not in in_flight
+                and e['canonical_key'] not in running_keys
+                and failures.get(e['id'], (0, 0))[1] <= now
+            ]
+            free_slots = WATCHER_WORKERS - len(in_flight)
+
+        # Shortest (estimated) jobs first; costs are cached between ticks
+        if free_slots > 0 and len(new_entries) > free_slots:
+            new_entries = order_entries(new_entries, now)
+
+        with state_lock:
+            dispatched = []
+            for entry in new_entries:
+                if len(dispatched) >= free_slots:
+                    break
+                if entry['id'] in in_flight or entry['canonical_key'] in running_keys:
+                    continue
+                running_keys.add(entry['canonical_key'])
+                in_flight[entry['id']] = (entry, now)
+                dispatched.append(entry)
+            running = len(in_flight)
 
         if not new_entries:
-            print("  No new entries to process")
-            return
+            print(f"  No new entries to process ({running} in flight)")
+            return False
 
-        print(f"  Found {len(new_entries)} new entry(ies)")
+        print(f"  Found {len(new_entries)} new entry(ies), "
+              f"dispatching {len(dispatched)} ({running} in flight)")
 
-        for entry in new_entries:
+        for entry in dispatched:
             print(f"\n  → Processing: {entry['name'][:50]}...")
-            success = process_entry(entry)
-
-            if success:
-                processed_ids.add(entry['id'])
-                save_processed_id(entry['id'])
-                print(f"  ✓ Done: {entry['name'][:50]}")
-            else:
-                print(f"  ✗ Failed: {entry['name'][:50]}")
+            executor.submit(run_entry, entry)
+        return True
 
     except Exception as e:
         print(f"  Error: {e}")
+        return False
+
+def next_interval(interval, active):
+    """Back to the minimum after activity, otherwise grow with jitter up to the maximum"""
+    if active:
+        return POLL_MIN_INTERVAL
+    interval = interval * POLL_BACKOFF * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+    return max(POLL_MIN_INTERVAL, min(POLL_MAX_INTERVAL, interval))
+
+class WakeHandler(BaseHTTPRequestHandler):
+    """POST /wake: check Notion now instead of waiting for the next poll"""
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/wake':
+            self.send_response(404)
+            self.end_headers()
+            return
+        wake_event.set()
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_wake_listener():
+    """Listen for wake-up pings on localhost"""
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", WAKE_PORT), WakeHandler)
+    except OSError as e:
+        print(f"Wake-up listener disabled: {e}")
+        return
+    threading.Thread(target=server.serve_forever, name="wake-listener", daemon=True).start()
+    print(f"Wake-up endpoint: http://127.0.0.1:{WAKE_PORT}/wake")
 
 def main():
     global processed_ids
 
     print("=" * 50)
     print("Transcript Pipeline Watcher")
-    print(f"Polling every {POLL_INTERVAL} seconds")
+    print(f"Polling every {POLL_MIN_INTERVAL}-{POLL_MAX_INTERVAL} seconds, "
+          f"{WATCHER_WORKERS} worker(s)")
     print("Press Ctrl+C to stop")
     print("=" * 50)
 
-    # Load previously processed IDs
-    processed_ids = load_processed_ids()
-    print(f"Loaded {len(processed_ids)} previously processed entries")
+    # Open the processed IDs store (nothing is loaded into memory)
+    processed_ids = ProcessedStore()
+    expire_processed_ids()
+    last_expire = time.time()
+    print(f"{len(processed_ids)} previously processed entries on record")
+
+    start_wake_listener()
 
     # Initial check
-    check_and_process()
+    interval = next_interval(POLL_MIN_INTERVAL, check_and_process())
 
-    # Polling loop
+    # Polling loop (keeps running while jobs are in flight)
     while True:
-        time.sleep(POLL_INTERVAL)
-        check_and_process()
+        woken = wake_event.wait(interval)
+        wake_event.clear()
+        if woken:
+            print("  Woken up")
+
+        active = check_and_process()
+        interval = next_interval(interval, active or woken)
+        print(f"  Next check in {interval:.0f}s")
+
+        if time.time() - last_expire > EXPIRE_INTERVAL:
+            expire_processed_ids()
+            last_expire = time.time()
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
         print("\n\nStopped.")
+        executor.shutdown(wait=False, cancel_futures=True)
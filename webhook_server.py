@@ -2,13 +2,32 @@
 """
 Webhook server for n8n integration.
 Exposes an endpoint that triggers the transcript pipeline.
+
+Requests are stored in a durable SQLite job queue and consumed by a fixed
+pool of warm worker processes, so bursts are processed at a controlled rate
+and no job pays for a cold interpreter start.
+
+Admission control keeps bursts from exhausting the LLM and TTS quotas: each
+client is rate limited (token bucket) and the queue depth is capped. Both
+answer 429 with a Retry-After header.
+
+A job that fails while a dependency's circuit breaker is open is parked:
+requeued for when the breaker may close, without using up an attempt.
 """
 
 import os
-import subprocess
+import math
+import time
 import threading
-from flask import Flask, request, jsonify
+import urllib.request
+from flask import Flask, Response, request, jsonify
 from dotenv import load_dotenv
+from job_queue import JobQueue, QueueFull
+from metrics import Metrics
+from job_manifest import stage_timings
+from url_canon import canonical_key
+from warm_worker import WarmWorker, run_job
+import circuit_breaker
 
 load_dotenv()
 
@@ -17,41 +36,225 @@ app = Flask(__name__)
 # Secret token for basic auth (set in .env)
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "change-me-in-production")
 
-def run_pipeline(page_id=None, url=None):
-    """Run the pipeline in a background thread"""
-    try:
-        if page_id and url:
-            # Process specific entry
-            result = subprocess.run(
-                ["python", "process_single.py", page_id, url],
-                capture_output=True,
-                text=True,
-                timeout=600,
-                cwd=os.path.dirname(os.path.abspath(__file__))
-            )
-        else:
-            # Process all pending entries
-            result = subprocess.run(
-                ["python", "process_all.py"],
-                capture_output=True,
-                text=True,
-                timeout=600,
-                cwd=os.path.dirname(os.path.abspath(__file__))
-            )
-
-        print(f"Pipeline completed. Return code: {result.returncode}")
-        if result.stdout:
-            print(f"Output: {result.stdout[:500]}")
-        if result.stderr:
-            print(f"Errors: {result.stderr[:500]}")
+# Number of pipelines allowed to run at the same time
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
 
-    except Exception as e:
-        print(f"Pipeline error: {e}")
+# Admission control: jobs allowed to wait, and webhook requests per second
+# per client (with bursts up to RATE_LIMIT_BURST)
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "50"))
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "2"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))
+
+# Retry-After sent when the queue is full
+QUEUE_FULL_RETRY_AFTER = int(os.getenv("QUEUE_FULL_RETRY_AFTER", "60"))
+
+job_queue = JobQueue()
+
+# Job and span latency aggregated for /metrics
+metrics = Metrics()
+
+# Watcher wake-up endpoint (see watcher.py)
+WATCHER_WAKE_URL = os.getenv("WATCHER_WAKE_URL", "http://127.0.0.1:5051/wake")
+
+# Set when a job is enqueued, so idle workers pick it up immediately
+job_available = threading.Event()
+
+# Function run by the worker processes (swappable for load tests)
+JOB_TARGET = run_job
+
+# WarmWorker handles and their consumer threads, started by start_workers()
+workers = []
+worker_threads = []
+
+# Set by stop_workers(): consumer threads exit after their current job
+workers_stopping = threading.Event()
+
+BREAKER_STATE_VALUES = {
+    circuit_breaker.CLOSED: 0,
+    circuit_breaker.HALF_OPEN: 1,
+    circuit_breaker.OPEN: 2,
+}
+
+class TokenBucket:
+    """Per-client token bucket: RATE_LIMIT_RPS tokens/s, up to RATE_LIMIT_BURST"""
+
+    def __init__(self, rate=RATE_LIMIT_RPS, burst=RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Consume a token; return 0, or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+# client address -> TokenBucket
+buckets = {}
+buckets_lock = threading.Lock()
+
+# Requests turned away since startup, by reason
+rejected = {"rate_limited": 0, "queue_full": 0}
+
+def too_many_requests(reason, retry_after, message):
+    """429 response with a Retry-After header (whole seconds)"""
+    with buckets_lock:
+        rejected[reason] += 1
+    response = jsonify({"error": message, "reason": reason})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+@app.before_request
+def rate_limit():
+    """Token-bucket rate limit on the webhook endpoints, per client address"""
+    if not request.path.startswith("/webhook/") or RATE_LIMIT_RPS <= 0:
+        return None
+
+    client = request.remote_addr or "unknown"
+    with buckets_lock:
+        bucket = buckets.get(client)
+        if bucket is None:
+            # Buckets idle long enough to be full again are the same as new ones
+            if len(buckets) > 1000:
+                idle = RATE_LIMIT_BURST / RATE_LIMIT_RPS
+                now = time.monotonic()
+                for key in [k for k, b in buckets.items() if now - b.updated > idle]:
+                    del buckets[key]
+            bucket = buckets[client] = TokenBucket()
+        wait = bucket.take()
+
+    if wait:
+        return too_many_requests("rate_limited", wait, "Rate limit exceeded")
+    return None
+
+def job_worker(worker):
+    """Consume jobs from the queue until stop_workers(), running them in a warm process"""
+    worker.wait_ready()
+
+    while not workers_stopping.is_set():
+        job = job_queue.claim()
+        if job is None:
+            job_available.wait(timeout=5)
+            job_available.clear()
+            continue
+
+        print(f"Job {job['id']} started on {worker.name} (attempt {job['attempts']}): "
+              f"{job['page_id'] or 'all pending'}")
+        started = time.time()
+        success, error, spans, parked = worker.run(job['page_id'], job['url'])
+        metrics.observe_job(success, time.time() - started, spans)
+
+        # Only a job stopped by an open breaker waits for it; other failures retry as usual
+        if parked:
+            name, retry_in = parked
+            job_queue.defer(job['id'], retry_in, error or f"{name} circuit open")
+            print(f"Job {job['id']} parked: {name} circuit open, retry in {retry_in:.0f}s")
+            continue
+
+        job_queue.complete(job['id'], success, error)
+        print(f"Job {job['id']} {'done' if success else 'failed'}"
+              + (f": {error}" if error else ""))
+
+def start_workers():
+    """Requeue jobs interrupted by a restart and start the worker pool"""
+    requeued = job_queue.requeue_running()
+    if requeued:
+        print(f"Requeued {requeued} interrupted job(s)")
+
+    # Workers warm up in parallel while the server starts accepting requests
+    for i in range(JOB_WORKERS):
+        worker = WarmWorker(f"pipeline-worker-{i + 1}", target=JOB_TARGET)
+        worker.start()
+        workers.append(worker)
+        thread = threading.Thread(target=job_worker, args=(worker,),
+                                  name=f"job-worker-{i + 1}", daemon=True)
+        thread.start()
+        worker_threads.append(thread)
+
+def stop_workers(timeout=30):
+    """Stop the consumer threads (after their current job), then the worker processes"""
+    workers_stopping.set()
+    job_available.set()
+    for thread in worker_threads:
+        thread.join(timeout)
+    for worker in workers:
+        worker.stop()
+
+def enqueue_job(page_id=None, url=None):
+    job_id, created = job_queue.enqueue(page_id, url, max_queued=MAX_QUEUED_JOBS)
+    if created:
+        job_available.set()
+    return job_id, created
+
+def enqueue_full_run():
+    """Single-flight full run: returns (job_id, coalesced)"""
+    job_id, created, running = job_queue.enqueue_all(max_queued=MAX_QUEUED_JOBS)
+    if created and not running:
+        job_available.set()
+    return job_id, running or not created
 
 @app.route("/health", methods=["GET"])
 def health():
-    """Health check endpoint"""
-    return jsonify({"status": "ok"})
+    """Health check endpoint, with current load and circuit breaker states"""
+    counts = job_queue.counts()
+    with buckets_lock:
+        rejections = dict(rejected)
+        clients = len(buckets)
+
+    return jsonify({
+        "status": "ok",
+        "jobs": counts,
+        "load": {
+            "queued": counts.get("queued", 0),
+            "max_queued": MAX_QUEUED_JOBS,
+            "running": counts.get("running", 0),
+            "max_running": JOB_WORKERS,
+            "rate_limit_rps": RATE_LIMIT_RPS,
+            "rate_limit_burst": RATE_LIMIT_BURST,
+            "clients": clients,
+            "rejected": rejections,
+        },
+        "breakers": circuit_breaker.states(),
+    })
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus metrics: job and stage latency histograms, throughput, errors"""
+    counts = job_queue.counts()
+    with buckets_lock:
+        rejections = dict(rejected)
+
+    extra = [
+        ("pipeline_queue_jobs", "gauge", "Jobs in the queue by status",
+         [({"status": status}, n) for status, n in sorted(counts.items())]),
+        ("pipeline_workers", "gauge", "Warm worker processes", [({}, JOB_WORKERS)]),
+        ("webhook_rejected_total", "counter", "Requests refused with 429 by reason",
+         [({"reason": reason}, n) for reason, n in sorted(rejections.items())]),
+        ("pipeline_breaker_state", "gauge",
+         "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open)",
+         [({"dependency": name}, BREAKER_STATE_VALUES[state['state']])
+          for name, state in circuit_breaker.states().items()]),
+    ]
+    return Response(metrics.render(extra), mimetype="text/plain; version=0.0.4")
+
+@app.route("/jobs/<int:job_id>", methods=["GET"])
+def job_status(job_id):
+    """Status of a queued job, with per-stage timings"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Not found"}), 404
+
+    if job['page_id'] and job['url']:
+        job['stages'] = stage_timings(canonical_key(job['url']), since=job['created_at'])
+    if job['started_at']:
+        job['elapsed'] = round((job['finished_at'] or time.time()) - job['started_at'], 3)
+    return jsonify(job)
 
 @app.route("/webhook/process", methods=["POST"])
 def process_webhook():
@@ -75,16 +278,39 @@ def process_webhook():
     # Get optional parameters
     page_id = data.get("page_id")
     url = data.get("url")
+    if not (page_id and url):
+        page_id = url = None
 
-    # Run pipeline in background thread (don't block the response)
-    thread = threading.Thread(target=run_pipeline, args=(page_id, url))
-    thread.start()
+    # Queue the job (don't block the response)
+    try:
+        job_id, created = enqueue_job(page_id, url)
+    except QueueFull as e:
+        return too_many_requests("queue_full", QUEUE_FULL_RETRY_AFTER, f"Queue full: {e}")
 
     return jsonify({
-        "status": "processing",
-        "message": "Pipeline started in background"
+        "status": "queued",
+        "job_id": job_id,
+        "deduplicated": not created,
+        "message": "Pipeline queued" if created else "Job already queued for this entry"
     })
 
+@app.route("/webhook/notify", methods=["POST"])
+def notify_webhook():
+    """New Notion row: wake the watcher so it picks it up immediately"""
+    data = request.get_json() or {}
+
+    secret = data.get("secret") or request.headers.get("X-Webhook-Secret")
+    if secret != WEBHOOK_SECRET:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    try:
+        req = urllib.request.Request(WATCHER_WAKE_URL, data=b"", method="POST")
+        urllib.request.urlopen(req, timeout=2).close()
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Watcher not reachable: {e}"}), 502
+
+    return jsonify({"status": "ok", "message": "Watcher woken up"})
+
 @app.route("/webhook/process-all", methods=["POST"])
 def process_all_webhook():
     """Process all pending entries"""
@@ -94,16 +320,24 @@ def process_all_webhook():
     if secret != WEBHOOK_SECRET:
         return jsonify({"error": "Unauthorized"}), 401
 
-    thread = threading.Thread(target=run_pipeline)
-    thread.start()
+    # A trigger during a run only schedules (at most) one follow-up run
+    try:
+        job_id, coalesced = enqueue_full_run()
+    except QueueFull as e:
+        return too_many_requests("queue_full", QUEUE_FULL_RETRY_AFTER, f"Queue full: {e}")
 
     return jsonify({
-        "status": "processing",
-        "message": "Processing all pending entries"
+        "status": "queued",
+        "job_id": job_id,
+        "coalesced": coalesced,
+        "message": ("Run in progress, follow-up run scheduled" if coalesced
+                    else "Processing all pending entries")
     })
 
 if __name__ == "__main__":
+    start_workers()
     print("Starting webhook server on port 5050...")
     print(f"Health check: http://localhost:5050/health")
     print(f"Webhook endpoint: http://localhost:5050/webhook/process")
-    app.run(host="0.0.0.0", port=5050, debug=False)
+    print(f"Job status: http://localhost:5050/jobs/<id>")
+    app.run(host="0.0.0.0", port=5050, debug=False, threaded=True)
@@ -1,23 +1,58 @@
 import re
-import os
-from youtube_transcript_api import YouTubeTranscriptApi
-import yt_dlp
+import artifact_store
+import circuit_breaker
+
+# yt-dlp "expected" errors that still mean YouTube is blocking us
+BLOCKED_MESSAGES = ("not a bot", "HTTP Error 429", "Too Many Requests")
+
+# url -> video info: the scheduler's duration probe is reused by the extract
+# stage instead of asking yt-dlp twice (oldest entries dropped past the limit)
+INFO_CACHE_SIZE = 256
+_info_cache = {}
+
+class VideoUnavailable(Exception):
+    """The video itself can't be read (private, removed, region-locked...)"""
+
+def _video_unavailable(error):
+    """True if a yt-dlp DownloadError is about the video, not about YouTube"""
+    from yt_dlp.utils import ExtractorError
+
+    cause = error.exc_info[1] if error.exc_info else None
+    return (isinstance(cause, ExtractorError) and cause.expected
+            and not any(message in str(error) for message in BLOCKED_MESSAGES))
 
 def get_video_info(video_url):
-    """Get video title and metadata using yt-dlp"""
+    """Get video title and metadata using yt-dlp (cached per URL)"""
+    if video_url in _info_cache:
+        return _info_cache[video_url]
+
+    import yt_dlp
+
     ydl_opts = {
         'quiet': True,
         'no_warnings': True,
         'extract_flat': True,
     }
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(video_url, download=False)
-        return {
-            'title': info.get('title', 'Untitled'),
-            'channel': info.get('channel', info.get('uploader', 'Unknown')),
-            'duration': info.get('duration', 0),
-        }
+    # A dead link in the database is not a YouTube outage
+    with circuit_breaker.guard("youtube", ignore=(VideoUnavailable,)), \
+            yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        try:
+            info = ydl.extract_info(video_url, download=False)
+        except yt_dlp.utils.DownloadError as e:
+            if _video_unavailable(e):
+                raise VideoUnavailable(str(e)) from e
+            raise
+
+    video_info = {
+        'title': info.get('title', 'Untitled'),
+        'channel': info.get('channel', info.get('uploader', 'Unknown')),
+        'duration': info.get('duration', 0),
+    }
+    if len(_info_cache) >= INFO_CACHE_SIZE:
+        _info_cache.pop(next(iter(_info_cache)), None)
+    _info_cache[video_url] = video_info
+    return video_info
 
 def sanitize_filename(title):
     """Remove invalid characters from filename"""
@@ -46,24 +81,35 @@ def get_transcript(video_url, languages=['fr', 'en']):
     if not video_id:
         raise ValueError(f"Impossible d'extraire l'ID de la vidéo: {video_url}")
 
+    from youtube_transcript_api import YouTubeTranscriptApi
+    from youtube_transcript_api import _errors
+
+    # Errors about the video itself, not YouTube being unreachable or blocking us
+    content_errors = (_errors.TranscriptsDisabled, _errors.NoTranscriptFound,
+                      _errors.VideoUnavailable, _errors.VideoUnplayable,
+                      _errors.AgeRestricted, _errors.InvalidVideoId)
+
     try:
         api = YouTubeTranscriptApi()
 
-        # Essayer de récupérer directement avec les langues préférées
-        try:
-            transcript = api.fetch(video_id, languages=languages)
-            return transcript.snippets, transcript.language_code
-        except:
-            pass
+        with circuit_breaker.guard("youtube", ignore=content_errors):
+            # Essayer de récupérer directement avec les langues préférées
+            try:
+                transcript = api.fetch(video_id, languages=languages)
+                return transcript.snippets, transcript.language_code
+            except Exception:
+                pass
 
-        # Sinon, lister et prendre le premier disponible
-        transcript_list = api.list(video_id)
-        for transcript in transcript_list:
-            data = transcript.fetch()
-            return data.snippets, data.language_code
+            # Sinon, lister et prendre le premier disponible
+            transcript_list = api.list(video_id)
+            for transcript in transcript_list:
+                data = transcript.fetch()
+                return data.snippets, data.language_code
 
         raise Exception("Aucun transcript disponible")
 
+    except circuit_breaker.CircuitOpen:
+        raise
     except Exception as e:
         raise Exception(f"Erreur lors de la récupération du transcript: {e}")
 
@@ -100,10 +146,8 @@ def transcript_to_markdown(transcript_data, video_url, title=None):
 
     return '\n'.join(lines)
 
-def save_transcript(video_url, output_dir="output"):
-    """Get and save transcript as .md with video title"""
-    os.makedirs(output_dir, exist_ok=True)
-
+def save_transcript(video_url, output_dir=None):
+    """Get and save transcript as .md with video title (in the artifact store)"""
     # Get video info (title, channel, etc.)
     print("Fetching video info...")
     video_info = get_video_info(video_url)
@@ -116,10 +160,7 @@ def save_transcript(video_url, output_dir="output"):
     # Filename based on video title
     safe_title = sanitize_filename(title)
     filename = f"{safe_title}_transcript.md"
-    filepath = os.path.join(output_dir, filename)
-
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(markdown)
+    filepath = artifact_store.put_text(markdown, filename, kind="transcript", root=output_dir)
 
     print(f"Transcript saved: {filepath} (language: {lang})")
     return filepath, title
@@ -132,7 +173,6 @@ if __name__ == "__main__":
     try:
         filepath, title = save_transcript(test_url)
         print(f"\nContent (first 500 chars):")
-        with open(filepath, 'r') as f:
-            print(f.read()[:500])
+        print(artifact_store.read_text(filepath)[:500])
     except Exception as e:
         print(f"Error: {e}")